@@ -1,10 +1,59 @@
-from flask import Blueprint, request, jsonify
-from models.storage import LocalStorage
-from models.gpt_client import GPTClient
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from werkzeug.local import LocalProxy
+from models.storage import get_storage
+from models.gpt_client import get_gpt_client
+from models.job_queue import get_job_queue, register_job
 
 ai_bp = Blueprint('ai', __name__, url_prefix='/api/ai')
-storage = LocalStorage()
-gpt = GPTClient()
+# Resolved on each use, so importing the blueprint creates nothing
+storage = LocalProxy(get_storage)
+gpt = LocalProxy(get_gpt_client)
+job_queue = LocalProxy(get_job_queue)
+
+BULK_BATCH_SIZE = int(os.getenv('BULK_ANALYSIS_BATCH_SIZE', 10))
+BULK_MAX_WORKERS = int(os.getenv('BULK_ANALYSIS_WORKERS', 4))
+MAX_BULK_BATCH_SIZE = 25
+MAX_BULK_NOTES = 500
+
+def wants_async():
+    return 'respond-async' in request.headers.get('Prefer', '') or bool((request.json or {}).get('async'))
+
+def enqueue_job(kind, note_id):
+    """Queue an AI job and answer 202 with a job id the client can poll"""
+    job = job_queue.enqueue(kind, note_id)
+    response = jsonify({"job_id": job['id'], "status": job['status']})
+    response.headers['Location'] = f"{ai_bp.url_prefix}/jobs/{job['id']}/"
+    return response, 202
+
+def classify(note_id):
+    note = storage.get_note(note_id)
+    if not note:
+        return {"error": "Note not found"}, 404
+    
+    result = gpt.classify_note(
+        title=note['title'],
+        body=note['body']
+    )
+    
+    return result, 200
+
+def translate(note_id):
+    note = storage.get_note(note_id)
+    if not note:
+        return {"error": "Note not found"}, 404
+    
+    result = gpt.translate_to_planner(
+        title=note['title'],
+        body=note['body']
+    )
+    
+    return result, 200
+
+register_job('classify', classify)
+register_job('translate', translate)
 
 @ai_bp.route('/classify/', methods=['POST'])
 def classify_note():
@@ -15,22 +64,31 @@ def classify_note():
     if not note_id:
         return jsonify({"error": "note_id is required"}), 400
     
-    note = storage.get_note(note_id)
-    if not note:
-        return jsonify({"error": "Note not found"}), 404
+    if wants_async():
+        return enqueue_job('classify', note_id)
     
-    result = gpt.classify_note(
-        title=note['title'],
-        body=note['body']
-    )
-    
-    return jsonify(result), 200
+    result, status = classify(note_id)
+    return jsonify(result), status
 
 @ai_bp.route('/translate/', methods=['POST'])
 def translate_note():
     data = request.json
     note_id = data.get('note_id')
     
+    if not note_id:
+        return jsonify({"error": "note_id is required"}), 400
+    
+    if wants_async():
+        return enqueue_job('translate', note_id)
+    
+    result, status = translate(note_id)
+    return jsonify(result), status
+
+@ai_bp.route('/translate/stream/', methods=['GET'])
+def translate_note_stream():
+    """Stream planner suggestions as Server-Sent Events, one 'suggestion' event per task"""
+    note_id = request.args.get('note_id')
+    
     if not note_id:
         return jsonify({"error": "note_id is required"}), 400
     
@@ -38,9 +96,104 @@ def translate_note():
     if not note:
         return jsonify({"error": "Note not found"}), 404
     
-    result = gpt.translate_to_planner(
-        title=note['title'],
-        body=note['body']
+    def events():
+        try:
+            for suggestion in gpt.translate_to_planner_stream(title=note['title'], body=note['body']):
+                yield f"event: suggestion\ndata: {json.dumps(suggestion)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
     )
+
+@ai_bp.route('/jobs/<job_id>/', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+@ai_bp.route('/analyze/bulk/', methods=['POST'])
+def bulk_analyze_notes():
+    """Classify and categorize a backlog of unanalyzed notes, several notes per GPT call"""
+    data = request.json or {}
+    try:
+        limit = int(data.get('limit', 100))
+        batch_size = int(data.get('batch_size', BULK_BATCH_SIZE))
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({"error": "limit and batch_size must be integers"}), 400
+    limit = max(1, min(limit, MAX_BULK_NOTES))
+    batch_size = max(1, min(batch_size, MAX_BULK_BATCH_SIZE))
+    
+    notes, _ = storage.get_notes_page(is_analyzed=False, limit=limit)
+    if not notes:
+        return jsonify({"analyzed": 0, "results": [], "errors": []}), 200
+    
+    category_names = [c['name'] for c in storage.get_categories(status="active")]
+    batches = [notes[i:i + batch_size] for i in range(0, len(notes), batch_size)]
+    
+    analyses = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=BULK_MAX_WORKERS) as pool:
+        futures = {pool.submit(gpt.analyze_notes, batch, category_names): batch for batch in batches}
+        for future in as_completed(futures):
+            try:
+                analyses.extend(future.result())
+            except Exception as e:
+                errors.append({"note_ids": [n['id'] for n in futures[future]], "error": str(e)})
+    
+    with storage.transaction():
+        results = _apply_analyses(analyses, set(category_names))
+    
+    return jsonify({"analyzed": len(results), "results": results, "errors": errors}), 200
+
+def _apply_analyses(analyses, active_categories):
+    pending_categories = {c['name']: c for c in storage.get_categories(status="pending_approval")}
+    results = []
+    
+    for analysis in analyses:
+        note_id = analysis['note_id']
+        if not storage.get_note(note_id):
+            continue
+        
+        result = {
+            "note_id": note_id,
+            "classification": analysis.get('classification'),
+            "confidence": analysis.get('confidence'),
+            "reasoning": analysis.get('reasoning')
+        }
+        category_name = analysis.get('category')
+        
+        if analysis.get('classification') == 'task':
+            storage.update_note(note_id, is_analyzed=True)
+            result["status"] = "task"
+        elif category_name in active_categories:
+            inspiration = storage.create_inspiration(
+                note_id=note_id,
+                category=category_name,
+                ai_confidence=analysis.get('confidence')
+            )
+            storage.update_note(note_id, is_inspiration=True, is_analyzed=True)
+            result.update(category=category_name, inspiration_id=inspiration['id'], status="created")
+        elif category_name:
+            # New categories wait for approval, as with single-note categorization
+            category = pending_categories.get(category_name)
+            if category is None:
+                category = storage.create_category(
+                    name=category_name,
+                    status="pending_approval",
+                    discovered_by="ai"
+                )
+                pending_categories[category_name] = category
+            result.update(category=category_name, category_id=category['id'], status="pending_approval")
+        else:
+            result["status"] = "skipped"
+        
+        results.append(result)
     
-    return jsonify(result), 200
+    return results
@@ -0,0 +1,110 @@
+import re
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.exceptions import HTTPException
+from werkzeug.local import LocalProxy
+from models.storage import get_storage
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/batch')
+storage = LocalProxy(get_storage)
+
+MAX_OPERATIONS = 100
+BATCHABLE_BLUEPRINTS = ('notes', 'planner', 'links')
+BATCHABLE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+# "$2" is the response body of operation 2, "$2.id" a field of it. Only a whole string (or
+# a whole path segment) is a reference, so text such as "Pay $5 rent" is left alone
+REFERENCE = re.compile(r'\$(\d+)((?:\.\w+)*)')
+
+class BatchFailed(Exception):
+    def __init__(self, index, status, body):
+        super().__init__(f"Operation {index} failed with status {status}")
+        self.index = index
+        self.status = status
+        self.body = body
+
+def _lookup(match, results):
+    index = int(match.group(1))
+    if index >= len(results):
+        raise ValueError(f"${index} refers to an operation that has not run yet")
+    value = results[index]['body']
+    for key in filter(None, match.group(2).split('.')):
+        try:
+            value = value[int(key)] if isinstance(value, list) else value[key]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise ValueError(f"{match.group(0)} does not exist")
+    return value
+
+def _resolve(value, results):
+    if isinstance(value, str):
+        match = REFERENCE.fullmatch(value)
+        return _lookup(match, results) if match else value
+    if isinstance(value, list):
+        return [_resolve(v, results) for v in value]
+    if isinstance(value, dict):
+        return {k: _resolve(v, results) for k, v in value.items()}
+    return value
+
+def _resolve_path(path, results):
+    return '/'.join(str(_resolve(segment, results)) for segment in path.split('/'))
+
+def _dispatch(method, path, body):
+    """Run one operation through the same view function a standalone request would hit"""
+    try:
+        endpoint, values = current_app.url_map.bind('localhost').match(path, method=method)
+    except HTTPException:
+        return 404, {"error": f"No route for {method} {path}"}
+    if endpoint.split('.')[0] not in BATCHABLE_BLUEPRINTS:
+        return 400, {"error": f"{method} {path} cannot be batched"}
+
+    options = {} if body is None else {"json": body}
+    with current_app.test_request_context(path, method=method, **options):
+        try:
+            response = current_app.make_response(current_app.view_functions[endpoint](**values))
+        except HTTPException as e:
+            # abort(), or request.json rejecting a missing body: a failed operation, not a failed batch
+            return e.code or 500, {"error": e.description}
+    return response.status_code, response.get_json(silent=True)
+
+@batch_bp.route('/', methods=['POST'])
+def run_batch():
+    """Apply note, planner and link operations in one storage transaction.
+
+    Each operation is {"method", "path", "body"}; a body string or path segment that is
+    exactly $N or $N.field is replaced by that earlier result. If any operation fails,
+    none of them are applied.
+    """
+    data = request.json
+    operations = data.get('operations') if isinstance(data, dict) else None
+
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > MAX_OPERATIONS:
+        return jsonify({"error": f"At most {MAX_OPERATIONS} operations per batch"}), 400
+
+    results = []
+    try:
+        with storage.transaction():
+            for index, operation in enumerate(operations):
+                method = str(operation.get('method', '')).upper() if isinstance(operation, dict) else ''
+                if method not in BATCHABLE_METHODS:
+                    raise BatchFailed(index, 400, {"error": f"method must be one of {', '.join(BATCHABLE_METHODS)}"})
+
+                try:
+                    path = _resolve_path(str(operation.get('path', '')), results)
+                    body = _resolve(operation.get('body'), results)
+                except ValueError as e:
+                    raise BatchFailed(index, 400, {"error": str(e)})
+
+                status, response_body = _dispatch(method, path, body)
+                if status >= 400:
+                    raise BatchFailed(index, status, response_body)
+                results.append({"status": status, "body": response_body})
+    except BatchFailed as e:
+        return jsonify({
+            "error": "Batch rolled back",
+            "failed_operation": e.index,
+            "status": e.status,
+            "body": e.body
+        }), e.status
+
+    return jsonify({"results": results}), 200
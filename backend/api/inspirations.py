@@ -1,57 +1,54 @@
 from flask import Blueprint, request, jsonify
-from models.storage import LocalStorage
-from models.gpt_client import GPTClient
+from werkzeug.local import LocalProxy
+from models.storage import get_storage
+from models.gpt_client import get_gpt_client
+from models.job_queue import get_job_queue, register_job
+from models.similarity import get_similarity_index
+from models.inspiration_groups import get_inspiration_groups
+from api.ai import enqueue_job, wants_async
+from api.versioning import versioned
 
 inspirations_bp = Blueprint('inspirations', __name__, url_prefix='/api/inspirations')
-storage = LocalStorage()
-gpt = GPTClient()
+storage = LocalProxy(get_storage)
+gpt = LocalProxy(get_gpt_client)
+job_queue = LocalProxy(get_job_queue)
+similarity = LocalProxy(get_similarity_index)
+inspiration_groups = LocalProxy(get_inspiration_groups)
 
 @inspirations_bp.route('/', methods=['GET'])
+@versioned('inspirations', 'notes')
 def get_inspirations():
-    inspirations = storage.get_inspirations()
-    notes = storage.get_notes()
-    
-    result = {}
-    for insp in inspirations:
-        note = next((n for n in notes if n['id'] == insp['note_id']), None)
-        if note:
-            category = insp['category']
-            if category not in result:
-                result[category] = []
-            result[category].append({
-                **note,
-                'inspiration_id': insp['id'],
-                'ai_confidence': insp['ai_confidence']
-            })
-    
+    result = inspiration_groups.grouped()
     return jsonify(result), 200
 
 @inspirations_bp.route('/note/<note_id>/', methods=['GET'])
 def get_inspirations_by_note(note_id):
-    inspirations = storage.get_inspirations()
-    note_inspirations = [insp for insp in inspirations if insp['note_id'] == note_id]
+    note_inspirations = storage.get_inspirations_by_note(note_id)
     return jsonify(note_inspirations), 200
 
-@inspirations_bp.route('/categorize/', methods=['POST'])
-def categorize_note():
-    data = request.json
-    note_id = data.get('note_id')
-    
-    if not note_id:
-        return jsonify({"error": "note_id is required"}), 400
-    
+def categorize(note_id):
     note = storage.get_note(note_id)
     if not note:
-        return jsonify({"error": "Note not found"}), 404
+        return {"error": "Note not found"}, 404
     
     active_categories = storage.get_categories(status="active")
     category_names = [c['name'] for c in active_categories]
     
-    result = gpt.categorize_note(
-        title=note['title'],
-        body=note['body'],
-        existing_categories=category_names
-    )
+    # Near-duplicates of already filed notes are answered locally; only ambiguous notes reach GPT
+    match = similarity.match(note['title'], note['body'], categories=category_names, exclude_note_id=note_id)
+    if match and match[1] >= similarity.threshold:
+        result = {
+            "category": match[0],
+            "confidence": round(match[1], 2),
+            "is_new_category": False,
+            "reasoning": "Closely matches notes already in this category"
+        }
+    else:
+        result = gpt.categorize_note(
+            title=note['title'],
+            body=note['body'],
+            existing_categories=category_names
+        )
     
     is_new = result['is_new_category']
     category_name = result['category']
@@ -62,14 +59,14 @@ def categorize_note():
             status="pending_approval",
             discovered_by="ai"
         )
-        return jsonify({
+        return {
             "category": category_name,
             "confidence": result['confidence'],
             "is_new_category": True,
             "category_id": category['id'],
             "reasoning": result.get('reasoning'),
             "status": "pending_approval"
-        }), 200
+        }, 200
     else:
         inspiration = storage.create_inspiration(
             note_id=note_id,
@@ -79,21 +76,39 @@ def categorize_note():
         # Mark note as inspiration and analyzed
         storage.update_note(note_id, is_inspiration=True, is_analyzed=True)
         
-        return jsonify({
+        return {
             "category": category_name,
             "confidence": result['confidence'],
             "is_new_category": False,
             "inspiration_id": inspiration['id'],
             "reasoning": result.get('reasoning'),
             "status": "created"
-        }), 201
+        }, 201
+
+register_job('categorize', categorize)
+
+@inspirations_bp.route('/categorize/', methods=['POST'])
+def categorize_note():
+    data = request.json
+    note_id = data.get('note_id')
+    
+    if not note_id:
+        return jsonify({"error": "note_id is required"}), 400
+    
+    if wants_async():
+        return enqueue_job('categorize', note_id)
+    
+    result, status = categorize(note_id)
+    return jsonify(result), status
 
 @inspirations_bp.route('/categories/', methods=['GET'])
+@versioned('inspiration_categories')
 def get_categories():
     categories = storage.get_categories(status="active")
     return jsonify(categories), 200
 
 @inspirations_bp.route('/categories/pending/', methods=['GET'])
+@versioned('inspiration_categories')
 def get_pending_categories():
     categories = storage.get_categories(status="pending_approval")
     return jsonify(categories), 200
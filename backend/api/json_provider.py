@@ -0,0 +1,53 @@
+from flask.json.provider import DefaultJSONProvider
+from models.records import Record, as_rows
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Match DefaultJSONProvider: sorted keys, and non-native types go through its default hook
+ORJSON_OPTIONS = (
+    orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+) if orjson is not None else 0
+
+def _default(o):
+    if isinstance(o, Record):
+        return o.to_dict()
+    return DefaultJSONProvider.default(o)
+
+def _rows(obj):
+    # List responses (bare, or under a key like "items") are converted in one pass rather
+    # than through default once per record
+    if type(obj) is list:
+        return as_rows(obj)
+    if type(obj) is dict:
+        return {key: as_rows(value) if type(value) is list else value for key, value in obj.items()}
+    return obj
+
+class RecordJSONProvider(DefaultJSONProvider):
+    """The default Flask JSON provider, extended to serialize storage records in their JSON form."""
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        return super().dumps(_rows(obj), **kwargs)
+
+class OrjsonProvider(RecordJSONProvider):
+    """Flask JSON provider backed by orjson, with the same key order and type handling as the default one."""
+
+    available = orjson is not None
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(_rows(obj), default=self.default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(_rows(obj), default=self.default, option=ORJSON_OPTIONS),
+            mimetype=self.mimetype
+        )
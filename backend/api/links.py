@@ -1,8 +1,9 @@
 from flask import Blueprint, request, jsonify
-from models.storage import LocalStorage
+from werkzeug.local import LocalProxy
+from models.storage import get_storage
 
 links_bp = Blueprint('links', __name__, url_prefix='/api/links')
-storage = LocalStorage()
+storage = LocalProxy(get_storage)
 
 @links_bp.route('/', methods=['POST'])
 def create_link():
@@ -0,0 +1,56 @@
+import os
+import re
+import threading
+import time
+from flask import Blueprint, Response, request
+from models.metrics import REGISTRY
+from models.profiler import SamplingProfiler
+
+metrics_bp = Blueprint('metrics', __name__)
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time to handle HTTP requests", ["method", "route", "status"]
+)
+
+# Opt-in: requests slower than this many milliseconds get their sampled stacks dumped
+PROFILE_SLOW_REQUESTS_MS = float(os.getenv("PROFILE_SLOW_REQUESTS_MS", 0))
+profiler = SamplingProfiler(
+    output_dir=os.getenv("PROFILE_OUTPUT_DIR", "generated/profiles"),
+    interval=float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5)) / 1000
+) if PROFILE_SLOW_REQUESTS_MS > 0 else None
+
+# Kept in the request's environ rather than g: batch operations run in nested request
+# contexts that share the app context, and so g, with the batch request
+START_KEY = "metrics.request_start"
+STATUS_KEY = "metrics.response_status"
+
+@metrics_bp.before_app_request
+def start_timer():
+    request.environ[START_KEY] = time.perf_counter()
+    if profiler:
+        profiler.start(threading.get_ident())
+
+@metrics_bp.after_app_request
+def remember_status(response):
+    request.environ[STATUS_KEY] = response.status_code
+    return response
+
+@metrics_bp.teardown_app_request
+def record_request(exc):
+    start = request.environ.pop(START_KEY, None)
+    if start is None:
+        return
+    duration = time.perf_counter() - start
+    # The URL rule rather than the path keeps one series per endpoint
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    REQUEST_SECONDS.observe(duration, method=request.method, route=route, status=request.environ.pop(STATUS_KEY, 500))
+
+    if profiler:
+        stacks = profiler.stop(threading.get_ident())
+        if duration * 1000 >= PROFILE_SLOW_REQUESTS_MS and stacks:
+            name = re.sub(r'[^A-Za-z0-9]+', '_', f"{request.method}{route}").strip('_')
+            profiler.dump(stacks, f"{name}-{int(duration * 1000)}ms")
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
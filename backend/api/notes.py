@@ -1,13 +1,67 @@
+import base64
+import json
+from datetime import datetime
 from flask import Blueprint, request, jsonify
-from models.storage import LocalStorage
+from werkzeug.local import LocalProxy
+from models.storage import get_storage
+from api.versioning import versioned
 
 notes_bp = Blueprint('notes', __name__, url_prefix='/api/notes')
-storage = LocalStorage()
+storage = LocalProxy(get_storage)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def _encode_cursor(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+def _decode_cursor(token):
+    created_at, note_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    # Raises ValueError/TypeError for a tampered cursor, before storage compares it
+    datetime.fromisoformat(created_at)
+    return created_at, note_id
+
+def _parse_bool(value):
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes')
 
 @notes_bp.route('/', methods=['GET'])
+@versioned('notes')
 def get_notes():
-    notes = storage.get_notes()
-    return jsonify(notes), 200
+    """List notes. Passing limit or cursor switches to a paginated {items, next_cursor} response."""
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    fields = request.args.get('fields')
+    
+    after = None
+    if cursor:
+        try:
+            after = _decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+    
+    paginated = limit is not None or cursor is not None
+    if paginated:
+        limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    
+    notes, next_cursor = storage.get_notes_page(
+        after=after,
+        limit=limit,
+        is_inspiration=_parse_bool(request.args.get('is_inspiration')),
+        is_analyzed=_parse_bool(request.args.get('is_analyzed'))
+    )
+    
+    if fields:
+        selected = {'id'} | {f.strip() for f in fields.split(',') if f.strip()}
+        notes = [{k: v for k, v in note.items() if k in selected} for note in notes]
+    
+    if not paginated:
+        return jsonify(notes), 200
+    return jsonify({
+        "items": notes,
+        "next_cursor": _encode_cursor(next_cursor) if next_cursor else None
+    }), 200
 
 @notes_bp.route('/', methods=['POST'])
 def create_note():
@@ -68,10 +122,6 @@ def get_note_links(note_id):
         return jsonify({"error": "Note not found"}), 404
     
     links = storage.get_links_by_note(note_id)
-    planner_items = []
-    for link in links:
-        item = storage.get_planner_item(link['planner_item_id'])
-        if item:
-            planner_items.append(item)
+    planner_items = storage.get_planner_items_by_ids([link['planner_item_id'] for link in links])
     
     return jsonify(planner_items), 200
@@ -1,10 +1,13 @@
 from flask import Blueprint, request, jsonify
-from models.storage import LocalStorage
+from werkzeug.local import LocalProxy
+from models.storage import get_storage
+from api.versioning import versioned
 
 planner_bp = Blueprint('planner', __name__, url_prefix='/api/planner')
-storage = LocalStorage()
+storage = LocalProxy(get_storage)
 
 @planner_bp.route('/items/', methods=['GET'])
+@versioned('planner_items')
 def get_planner_items():
     date_start = request.args.get('date_start')
     date_end = request.args.get('date_end')
@@ -73,10 +76,6 @@ def get_planner_item_links(item_id):
         return jsonify({"error": "Planner item not found"}), 404
     
     links = storage.get_links_by_planner_item(item_id)
-    notes = []
-    for link in links:
-        note = storage.get_note(link['note_id'])
-        if note:
-            notes.append(note)
+    notes = storage.get_notes_by_ids([link['note_id'] for link in links])
     
     return jsonify(notes), 200
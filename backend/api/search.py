@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify
+from werkzeug.local import LocalProxy
+from models.storage import get_storage
+from models.search_index import get_search_index
+
+search_bp = Blueprint('search', __name__, url_prefix='/api/search')
+storage = LocalProxy(get_storage)
+search_index = LocalProxy(get_search_index)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+@search_bp.route('/', methods=['GET'])
+def search():
+    """Full-text search over notes and planner items, best match first."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    
+    doc_type = request.args.get('type')
+    if doc_type not in (None, 'note', 'planner_item'):
+        return jsonify({"error": "type must be note or planner_item"}), 400
+    
+    limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+    matches = search_index.search(query, doc_type=doc_type, limit=limit)
+    
+    notes = {n['id']: n for n in storage.get_notes_by_ids([m[1] for m in matches if m[0] == 'note'])}
+    items = {i['id']: i for i in storage.get_planner_items_by_ids([m[1] for m in matches if m[0] == 'planner_item'])}
+    
+    results = []
+    for result_type, record_id, score in matches:
+        record = (notes if result_type == 'note' else items).get(record_id)
+        if record:
+            results.append({"type": result_type, "score": round(score, 4), "item": record})
+    
+    return jsonify(results), 200
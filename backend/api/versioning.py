@@ -0,0 +1,90 @@
+import functools
+import hashlib
+from flask import Blueprint, request, jsonify, make_response
+from werkzeug.local import LocalProxy
+from models.storage import get_storage
+from models.change_tracker import get_change_tracker
+
+versioning_bp = Blueprint('versioning', __name__, url_prefix='/api/changes')
+storage = LocalProxy(get_storage)
+tracker = LocalProxy(get_change_tracker)
+
+# collection -> (all records, records by id), used to build deltas
+COLLECTIONS = {
+    "notes": (lambda: storage.get_notes(), lambda ids: storage.get_notes_by_ids(ids)),
+    "planner_items": (lambda: storage.get_planner_items(), lambda ids: storage.get_planner_items_by_ids(ids)),
+    "inspirations": (lambda: storage.get_inspirations(), lambda ids: storage.get_inspirations_by_ids(ids)),
+    "inspiration_categories": (lambda: storage.get_categories(), lambda ids: _categories_by_ids(ids)),
+}
+
+def _categories_by_ids(category_ids):
+    category_ids = set(category_ids)
+    return [c for c in storage.get_categories() if c['id'] in category_ids]
+
+@versioning_bp.route('/<collection>/', methods=['GET'])
+def get_changes(collection):
+    """Raw records of collection changed after ?since=<version>, plus ids deleted since then.
+
+    Rows have the shape of the collection itself, not of any list endpoint (inspirations
+    are not grouped, planner items are not filtered by date). since=0 returns every record;
+    the returned version is the since of the next call.
+    """
+    if collection not in COLLECTIONS:
+        return jsonify({"error": f"Unknown collection: {collection}"}), 404
+    try:
+        since = int(request.args.get('since', ''))
+    except ValueError:
+        return jsonify({"error": "since must be an integer version"}), 400
+    if since < 0:
+        return jsonify({"error": "since must be an integer version"}), 400
+
+    # Read the version before the changes, so anything changed in between is sent again next time
+    storage.refresh([collection])
+    version = tracker.versions([collection])[0]
+    if since > version:
+        return jsonify({"error": "Unknown version; fetch the full collection again"}), 410
+
+    get_all, get_by_ids = COLLECTIONS[collection]
+    if since == 0:
+        items, deleted = get_all(), []
+    else:
+        changed, deleted = tracker.changes_since(collection, since)
+        items = get_by_ids(changed)
+    return jsonify({"version": version, "items": items, "deleted": deleted}), 200
+
+def versioned(collection, *also_reads):
+    """Serve a list endpoint with a strong ETag.
+
+    The ETag covers the versions of collection and also_reads plus the query string, so
+    If-None-Match is answered with 304 without reading records. Deltas are served by
+    /api/changes/<collection>/?since=<version>, not by the list endpoint.
+    """
+    collections = (collection,) + also_reads
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if 'since' in request.args:
+                return jsonify({"error": f"Use /api/changes/{collection}/?since= for deltas"}), 400
+
+            # Versions are read before the view runs, so a stale ETag can only under-claim.
+            # Storage first checks its files, so a write by another process bumps them too
+            storage.refresh(collections)
+            versions = tracker.versions(collections)
+            etag = '-'.join([tracker.epoch] + [str(v) for v in versions])
+            if request.query_string:
+                etag += '-' + hashlib.sha1(request.query_string).hexdigest()[:12]
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Let browsers cache the list but revalidate it on every request
+            response.cache_control.no_cache = True
+            response.headers['X-Collection-Version'] = str(versions[0])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,50 @@
+"""Compare two benchmark result files, e.g. from two commits or two storage formats.
+
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+
+Prints the p50 latency change of every benchmark present in both files and exits with
+status 1 if any slowed down by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+def _index(report: Dict) -> Dict[Tuple[str, int, str, str], Dict]:
+    index = {}
+    for run in report["runs"]:
+        for group, benchmarks in run["benchmarks"].items():
+            for name, stats in benchmarks.items():
+                index[(run["backend"], run["size"], group, name)] = stats
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p50_ms", choices=["p50_ms", "p99_ms", "mean_ms"])
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = _index(json.load(f))
+    with open(args.candidate) as f:
+        candidate = _index(json.load(f))
+
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before = baseline[key][args.metric]
+        after = candidate[key][args.metric]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        backend, size, group, name = key
+        print(f"{backend:>7} {size:>7} {group:>7}  {name:<45} {before:>10.3f} -> {after:>10.3f} ms ({change:+.1f}%){flag}")
+
+    print(f"\n{regressions} regression(s) above {args.threshold}% in {args.metric}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
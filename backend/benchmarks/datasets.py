@@ -0,0 +1,59 @@
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+WORDS = """
+guitar piano cover song chords practice studio record album lyric melody concert paint sketch mural
+canvas gallery museum sculpture photo film trip flight hotel beach mountain hike museum brooklyn
+queens park ferry dinner brunch recipe grocery market coffee bakery ramen dumpling taco pizza meeting
+email deadline report review budget invoice client project launch design prototype research paper
+draft slides call sync plan goal habit workout run yoga swim gym stretch sleep journal book novel
+poem essay podcast episode garden plant repair move apartment lease laundry clean paint shelf
+birthday gift party wedding holiday packing passport visa ticket train bus bike walk weekend morning
+evening tomorrow monday friday summer winter spring autumn friend family team mentor neighbor
+""".split()
+
+CATEGORIES = ["song covers", "songs written", "art ideas", "NYC activities", "travel places"]
+VIEW_TYPES = ["daily", "weekly", "monthly"]
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def populate(storage, size: int, seed: int = 0) -> Dict[str, List[str]]:
+    """Fill storage with size notes, planner items and links (plus size // 10 inspirations).
+
+    Contents depend only on size and seed. Everything is written in one transaction so
+    generating large datasets does not rewrite the collection files once per record.
+    Returns the created ids per collection.
+    """
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    ids = {"notes": [], "planner_items": [], "links": [], "inspirations": []}
+
+    with storage.transaction():
+        for name in CATEGORIES:
+            storage.create_category(name)
+
+        for _ in range(size):
+            note = storage.create_note(_text(rng, rng.randint(2, 6)), _text(rng, rng.randint(10, 60)))
+            ids["notes"].append(note["id"])
+
+        for _ in range(size):
+            item = storage.create_planner_item(
+                title=_text(rng, rng.randint(2, 5)),
+                body=_text(rng, rng.randint(5, 30)),
+                date=(start + timedelta(days=rng.randrange(365))).isoformat(),
+                time=f"{rng.randrange(24):02d}:00" if rng.random() < 0.5 else None,
+                view_type=rng.choice(VIEW_TYPES)
+            )
+            ids["planner_items"].append(item["id"])
+
+        for _ in range(size):
+            link = storage.create_link(rng.choice(ids["notes"]), rng.choice(ids["planner_items"]))
+            ids["links"].append(link["id"])
+
+        for note_id in rng.sample(ids["notes"], size // 10):
+            inspiration = storage.create_inspiration(note_id, rng.choice(CATEGORIES), round(rng.random(), 2))
+            ids["inspirations"].append(inspiration["id"])
+
+    return ids
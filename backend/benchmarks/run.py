@@ -0,0 +1,224 @@
+"""Benchmark storage methods and API routes against synthetic datasets.
+
+Run from the backend directory:
+
+    python -m benchmarks.run                          # json, log and sqlite at 1k, 10k and 100k
+    python -m benchmarks.run --backends sqlite --sizes 1000,10000 --output sqlite.json
+
+Each (backend, size) pair runs in a fresh process inside a temporary directory, with
+GPTClient replaced by benchmarks.stub_gpt.StubGPTClient. Compare two result files with
+benchmarks.compare.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+Benchmark = Tuple[str, Callable[[int], object]]
+
+def _percentile(samples: List[float], percent: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+def measure(op: Callable[[int], object], max_iterations: int, max_seconds: float) -> Dict:
+    op(0)  # warm up caches and lazily built indexes
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    for i in range(1, max_iterations + 1):
+        start = time.perf_counter()
+        op(i)
+        samples.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    return {
+        "iterations": len(samples),
+        "ops_per_sec": round(len(samples) / sum(samples), 2),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+        "p50_ms": round(_percentile(samples, 50) * 1000, 4),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 4)
+    }
+
+def storage_benchmarks(storage, ids: Dict[str, List[str]], rng: random.Random) -> List[Benchmark]:
+    notes, items, links, inspirations = ids["notes"], ids["planner_items"], ids["links"], ids["inspirations"]
+    for id_list in (notes, items, links, inspirations):
+        rng.shuffle(id_list)
+    pick = lambda id_list, i: id_list[i % len(id_list)]
+    window = lambda id_list, i: [pick(id_list, i + j) for j in range(50)]
+    categories = storage.get_categories()
+    # Records created by the create_* benchmarks, consumed by the matching delete_* ones
+    created = {"notes": [], "planner_items": [], "links": [], "inspirations": []}
+
+    return [
+        ("get_notes", lambda i: storage.get_notes()),
+        ("get_notes_page", lambda i: storage.get_notes_page(limit=50)),
+        ("get_notes_page_filtered", lambda i: storage.get_notes_page(limit=50, is_inspiration=True)),
+        ("get_note", lambda i: storage.get_note(pick(notes, i))),
+        ("get_notes_by_ids", lambda i: storage.get_notes_by_ids(window(notes, i))),
+        ("get_planner_items", lambda i: storage.get_planner_items()),
+        ("get_planner_items_week", lambda i: storage.get_planner_items(date_start="2025-03-01", date_end="2025-03-07")),
+        ("get_planner_items_view_type", lambda i: storage.get_planner_items(view_type="monthly", status="pending")),
+        ("get_planner_item", lambda i: storage.get_planner_item(pick(items, i))),
+        ("get_planner_items_by_ids", lambda i: storage.get_planner_items_by_ids(window(items, i))),
+        ("get_inspirations", lambda i: storage.get_inspirations()),
+        ("get_inspirations_by_note", lambda i: storage.get_inspirations_by_note(pick(notes, i))),
+        ("get_inspirations_grouped", lambda i: storage.get_inspirations_grouped()),
+        ("get_categories", lambda i: storage.get_categories(status="active")),
+        ("get_links_by_note", lambda i: storage.get_links_by_note(pick(notes, i))),
+        ("get_links_by_planner_item", lambda i: storage.get_links_by_planner_item(pick(items, i))),
+        ("create_note", lambda i: created["notes"].append(storage.create_note(f"note {i}", "benchmark body")["id"])),
+        ("update_note", lambda i: storage.update_note(pick(notes, i), title=f"updated {i}")),
+        ("create_planner_item", lambda i: created["planner_items"].append(storage.create_planner_item(
+            title=f"item {i}", body="benchmark body", date="2025-06-01", time=None, view_type="daily")["id"])),
+        ("update_planner_item", lambda i: storage.update_planner_item(pick(items, i), title=f"updated {i}")),
+        ("toggle_planner_item_status", lambda i: storage.toggle_planner_item_status(pick(items, i))),
+        ("create_link", lambda i: created["links"].append(
+            storage.create_link(pick(created["notes"], i), pick(created["planner_items"], i))["id"])),
+        ("create_inspiration", lambda i: created["inspirations"].append(
+            storage.create_inspiration(pick(created["notes"], i), categories[i % len(categories)]["name"], 0.9)["id"])),
+        ("update_category_status", lambda i: storage.update_category_status(categories[i % len(categories)]["id"], "active")),
+        ("delete_link", lambda i: created["links"] and storage.delete_link(created["links"].pop())),
+        ("delete_inspiration", lambda i: created["inspirations"] and storage.delete_inspiration(created["inspirations"].pop())),
+        ("delete_planner_item", lambda i: created["planner_items"] and storage.delete_planner_item(created["planner_items"].pop())),
+        ("delete_note", lambda i: created["notes"] and storage.delete_note(created["notes"].pop())),
+    ]
+
+def route_benchmarks(client, ids: Dict[str, List[str]]) -> List[Benchmark]:
+    notes, items = ids["notes"], ids["planner_items"]
+    pick = lambda id_list, i: id_list[i % len(id_list)]
+
+    def request(method, path, **kwargs):
+        response = client.open(path, method=method, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.get_data(as_text=True)}")
+        return response
+
+    etag = request("GET", "/api/notes/").headers.get("ETag")
+    return [
+        ("GET /api/notes/", lambda i: request("GET", "/api/notes/")),
+        ("GET /api/notes/ (If-None-Match)", lambda i: request("GET", "/api/notes/", headers={"If-None-Match": etag})),
+        ("GET /api/notes/?limit=50", lambda i: request("GET", "/api/notes/?limit=50")),
+        ("GET /api/notes/<id>/", lambda i: request("GET", f"/api/notes/{pick(notes, i)}/")),
+        ("GET /api/notes/<id>/links/", lambda i: request("GET", f"/api/notes/{pick(notes, i)}/links/")),
+        ("GET /api/planner/items/ (week)",
+         lambda i: request("GET", "/api/planner/items/?date_start=2025-03-01&date_end=2025-03-07")),
+        ("GET /api/inspirations/", lambda i: request("GET", "/api/inspirations/")),
+        ("GET /api/search/", lambda i: request("GET", "/api/search/?q=guitar+prac")),
+        ("POST /api/notes/", lambda i: request("POST", "/api/notes/", json={"title": f"note {i}", "body": "body"})),
+        ("PUT /api/notes/<id>/", lambda i: request("PUT", f"/api/notes/{pick(notes, i)}/", json={"title": f"t {i}"})),
+        ("POST /api/planner/items/", lambda i: request("POST", "/api/planner/items/", json={
+            "title": f"item {i}", "body": "body", "date": "2025-06-01", "view_type": "daily"})),
+        ("PATCH /api/planner/items/<id>/complete/",
+         lambda i: request("PATCH", f"/api/planner/items/{pick(items, i)}/complete/")),
+        ("POST /api/batch/", lambda i: request("POST", "/api/batch/", json={"operations": [
+            {"method": "POST", "path": "/api/planner/items/",
+             "body": {"title": f"task {i}", "body": "body", "date": "2025-06-01", "view_type": "weekly"}},
+            {"method": "POST", "path": "/api/links/", "body": {"note_id": pick(notes, i), "planner_item_id": "$0.id"}},
+            {"method": "PATCH", "path": f"/api/notes/{pick(notes, i)}/", "body": {"is_analyzed": True}}
+        ]})),
+        ("POST /api/ai/classify/", lambda i: request("POST", "/api/ai/classify/", json={"note_id": pick(notes, i)})),
+        ("POST /api/ai/translate/", lambda i: request("POST", "/api/ai/translate/", json={"note_id": pick(notes, i)})),
+        ("POST /api/inspirations/categorize/",
+         lambda i: request("POST", "/api/inspirations/categorize/", json={"note_id": pick(notes, i)})),
+    ]
+
+def run_worker(size: int, seed: int, max_iterations: int, max_seconds: float) -> Dict:
+    """Benchmark the backend selected by STORAGE_BACKEND in the current directory."""
+    from benchmarks.datasets import populate
+    from benchmarks.stub_gpt import StubGPTClient
+    import models.gpt_client
+    from models.storage import get_storage
+
+    # Installed before the blueprints are imported, so every get_gpt_client() returns the stub
+    models.gpt_client._client.set(StubGPTClient())
+    storage = get_storage()
+
+    start = time.perf_counter()
+    ids = populate(storage, size, seed)
+    populate_seconds = time.perf_counter() - start
+
+    from server import app
+    client = app.test_client()
+    rng = random.Random(seed)
+
+    results = {"storage": {}, "routes": {}}
+    for name, op in storage_benchmarks(storage, {k: list(v) for k, v in ids.items()}, rng):
+        results["storage"][name] = measure(op, max_iterations, max_seconds)
+    for name, op in route_benchmarks(client, ids):
+        results["routes"][name] = measure(op, max_iterations, max_seconds)
+
+    return {"populate_seconds": round(populate_seconds, 3), "benchmarks": results}
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark storage backends and API routes.")
+    parser.add_argument("--backends", default="json,log,sqlite", help="comma-separated STORAGE_BACKEND values")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated dataset sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-iterations", type=int, default=200, help="iterations per benchmark")
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="time budget per benchmark")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(int(args.sizes), args.seed, args.max_iterations, args.max_seconds)
+        with open(args.result_file, 'w') as f:
+            json.dump(result, f)
+        return
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat() + 'Z',
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "storage_format": os.getenv("STORAGE_FORMAT", "json"),
+        "storage_sharding": os.getenv("STORAGE_SHARDING", "none"),
+        "settings": {"seed": args.seed, "max_iterations": args.max_iterations, "max_seconds": args.max_seconds},
+        "runs": []
+    }
+
+    for backend in args.backends.split(","):
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(f"Benchmarking {backend} with {size} records...", flush=True)
+            with tempfile.TemporaryDirectory() as workdir:
+                env = dict(os.environ, STORAGE_BACKEND=backend, GPT_CACHE_ENABLED="false",
+                           PYTHONPATH=str(BACKEND_DIR))
+                env.setdefault("OPENAI_API_KEY", "benchmark")
+                result_file = Path(workdir) / "result.json"
+                subprocess.run(
+                    [sys.executable, "-m", "benchmarks.run", "--worker", "--sizes", str(size),
+                     "--seed", str(args.seed), "--max-iterations", str(args.max_iterations),
+                     "--max-seconds", str(args.max_seconds), "--result-file", str(result_file)],
+                    cwd=workdir, env=env, check=True
+                )
+                result = json.loads(result_file.read_text())
+            report["runs"].append({"backend": backend, "size": size, **result})
+
+    output = Path(args.output) if args.output else (
+        BACKEND_DIR / "benchmarks" / "results" / f"{commit or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import hashlib
+from datetime import date, timedelta
+from typing import Dict, Iterator, List
+
+from benchmarks.datasets import CATEGORIES
+
+def _digest(*parts: str) -> int:
+    return int.from_bytes(hashlib.sha256("\0".join(parts).encode()).digest()[:8], "big")
+
+class StubGPTClient:
+    """Deterministic, network-free stand-in for GPTClient with the same public methods.
+
+    Answers depend only on the note text, so benchmark runs are comparable across commits.
+    """
+
+    model = "stub"
+
+    def classify_note(self, title: str, body: str) -> Dict:
+        h = _digest(title, body)
+        return {
+            "classification": "inspiration" if h % 2 else "task",
+            "confidence": 0.5 + (h % 50) / 100,
+            "reasoning": "stub"
+        }
+
+    def categorize_note(self, title: str, body: str, existing_categories: list) -> Dict:
+        h = _digest(title, body)
+        categories = existing_categories or CATEGORIES
+        return {
+            "category": categories[h % len(categories)],
+            "confidence": 0.5 + (h % 50) / 100,
+            "is_new_category": not existing_categories,
+            "reasoning": "stub"
+        }
+
+    def translate_to_planner(self, title: str, body: str) -> Dict:
+        h = _digest(title, body)
+        start = date(2025, 1, 1) + timedelta(days=h % 365)
+        return {"suggestions": [
+            {
+                "title": f"{title} ({i + 1})",
+                "body": body[:80],
+                "date": (start + timedelta(days=i)).isoformat(),
+                "time": None,
+                "view_type": "daily"
+            }
+            for i in range(1 + h % 3)
+        ]}
+
+    def translate_to_planner_stream(self, title: str, body: str) -> Iterator[Dict]:
+        yield from self.translate_to_planner(title, body)["suggestions"]
+
+    def analyze_notes(self, notes: List[Dict], existing_categories: list) -> List[Dict]:
+        results = []
+        for note in notes:
+            result = dict(self.classify_note(note["title"], note["body"]), note_id=note["id"])
+            if result["classification"] == "inspiration":
+                result["category"] = self.categorize_note(note["title"], note["body"], existing_categories)["category"]
+            results.append(result)
+        return results
+
+    async def aclassify_note(self, title: str, body: str) -> Dict:
+        return self.classify_note(title, body)
+
+    async def acategorize_note(self, title: str, body: str, existing_categories: list) -> Dict:
+        return self.categorize_note(title, body, existing_categories)
+
+    async def atranslate_to_planner(self, title: str, body: str) -> Dict:
+        return self.translate_to_planner(title, body)
+
+    async def aanalyze_notes(self, notes: List[Dict], existing_categories: list) -> List[Dict]:
+        return self.analyze_notes(notes, existing_categories)
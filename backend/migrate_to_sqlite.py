@@ -0,0 +1,45 @@
+import os
+
+from dotenv import load_dotenv
+
+from models.change_tracker import track_changes
+from models.log_storage import LogStorage
+from models.storage import create_storage
+from models.sqlite_storage import SQLiteStorage
+
+def migrate_json_to_sqlite():
+    # STORAGE_BACKEND and STORAGE_SHARDING in .env say where the data is now
+    load_dotenv()
+    if os.getenv("STORAGE_BACKEND", "json") == "sqlite":
+        raise SystemExit("STORAGE_BACKEND is already sqlite; set it to the backend that holds the data to migrate")
+    source = create_storage()
+    
+    collections = [
+        ("notes", source.notes_file, source.get_notes),
+        ("planner_items", source.planner_items_file, source.get_planner_items),
+        ("inspirations", source.inspirations_file, source.get_inspirations),
+        ("inspiration_categories", source.categories_file, source.get_categories),
+        ("links", source.links_file, source.get_links)
+    ]
+    
+    # Only the log backend replays its logs; reading the snapshots alone would lose those changes
+    if not isinstance(source, LogStorage):
+        logs = [file_path.with_suffix(".log") for _, file_path, _ in collections]
+        logs = [log for log in logs if log.exists() and log.stat().st_size]
+        if logs:
+            raise SystemExit(f"{', '.join(log.name for log in logs)} hold changes not compacted yet; "
+                             "run with STORAGE_BACKEND=log to include them")
+    
+    target = SQLiteStorage()
+    # Imported tables get new versions, so clients refetch them from the new backend
+    track_changes(target)
+    
+    for table, file_path, get_records in collections:
+        records = get_records()
+        target.import_records(table, records)
+        print(f"Migrated {len(records)} records from {file_path.stem} into {table}")
+    
+    print(f"\nMigration complete! Set STORAGE_BACKEND=sqlite to use {target.db_path}")
+
+if __name__ == '__main__':
+    migrate_json_to_sqlite()
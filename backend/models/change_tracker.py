@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.storage import get_storage, on_storage_created
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS collections (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    collection TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    deleted INTEGER NOT NULL,
+    PRIMARY KEY (collection, record_id)
+);
+CREATE INDEX IF NOT EXISTS idx_changes_version ON changes (collection, version);
+"""
+
+class ChangeTracker:
+    """Monotonic per-collection versions and per-record change/tombstone versions (generated/versions.db).
+
+    Every batch of changes storage reports bumps its collection's version, and each record it
+    touched remembers that version, so callers can ask what changed since a version they saw.
+    The database is shared by all processes using the same storage. A collection reloaded
+    from disk (another process or a script such as seed_categories.py wrote to it) gets a
+    new version too, so ETags change; which of its records changed is only known if the
+    writer recorded them here.
+    """
+
+    def __init__(self, storage, path: str):
+        self.path = Path(path)
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        # Identifies this database, so versions from a deleted and recreated one never match
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex[:8],))
+        conn.commit()
+        self.epoch = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+        storage.subscribe(self._on_change)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _on_change(self, collection: str, put: Optional[Sequence[Dict]], deleted: Sequence[str]):
+        # A reload may bring changes nobody recorded, so it bumps the version on its own
+        if put is not None and not (put or deleted):
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO collections (name, version) VALUES (?, 1) "
+                "ON CONFLICT (name) DO UPDATE SET version = version + 1",
+                (collection,)
+            )
+            if put is None:
+                return
+            version = conn.execute("SELECT version FROM collections WHERE name = ?", (collection,)).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO changes (collection, record_id, version, deleted) VALUES (?, ?, ?, ?)",
+                [(collection, record["id"], version, 0) for record in put]
+                + [(collection, record_id, version, 1) for record_id in deleted]
+            )
+
+    def versions(self, collections: Sequence[str]) -> List[int]:
+        rows = dict(self._connect().execute(
+            f"SELECT name, version FROM collections WHERE name IN ({', '.join('?' * len(collections))})",
+            tuple(collections)
+        ).fetchall())
+        return [rows.get(name, 0) for name in collections]
+
+    def changes_since(self, collection: str, version: int) -> Tuple[List[str], List[str]]:
+        """Return (changed ids, deleted ids) for records touched after version."""
+        changed, deleted = [], []
+        for record_id, is_deleted in self._connect().execute(
+            "SELECT record_id, deleted FROM changes WHERE collection = ? AND version > ? ORDER BY version",
+            (collection, version)
+        ):
+            (deleted if is_deleted else changed).append(record_id)
+        return changed, deleted
+
+_tracker = None
+
+def track_changes(storage) -> ChangeTracker:
+    """Record changes made through storage in its versions.db; for scripts that write outside the app."""
+    return ChangeTracker(storage, path=str(Path(storage.base_path) / "versions.db"))
+
+def _track(storage):
+    global _tracker
+    _tracker = track_changes(storage)
+
+# Subscribe as soon as storage exists, so a write made before the first versioned read is still counted
+on_storage_created(_track)
+
+def get_change_tracker() -> ChangeTracker:
+    """Return the process-wide change tracker over the shared storage."""
+    get_storage()
+    return _tracker
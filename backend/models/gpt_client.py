@@ -1,24 +1,197 @@
 import os
 import json
+import asyncio
+import string
+import threading
+import time
+from datetime import date
 from pathlib import Path
-from typing import Dict
-from openai import OpenAI
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 
-load_dotenv()
+from models.gpt_cache import ResponseCache
+from models.metrics import REGISTRY
+from models.rate_limiter import TokenBucket
+from models.shared import Lazy
+
+# The openai SDK (and httpx under it) is imported when the first client is built, not with this module
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+def retryable_errors() -> Tuple[type, ...]:
+    """Transient OpenAI failures worth retrying with backoff."""
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+    return (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+CALL_SECONDS = REGISTRY.histogram(
+    "gpt_call_seconds", "Time to answer GPT calls, by prompt and outcome (hit, miss or error)", ["prompt", "outcome"]
+)
+TOKENS = REGISTRY.counter("gpt_tokens_total", "Tokens used by GPT requests", ["model", "type"])
+
+class _ArrayItemParser:
+    """Incrementally pulls complete objects out of arrays held by a streamed top-level JSON object."""
+    
+    def __init__(self):
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.buffer = None
+    
+    def feed(self, text: str) -> List[Dict]:
+        items = []
+        for ch in text:
+            if self.buffer is not None:
+                self.buffer.append(ch)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+            
+            if ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                if ch == '{' and self.stack == ['{', '[']:
+                    self.buffer = [ch]
+                self.stack.append(ch)
+            elif ch in '}]':
+                self.stack.pop()
+                if ch == '}' and self.stack == ['{', '['] and self.buffer is not None:
+                    items.append(json.loads(''.join(self.buffer)))
+                    self.buffer = None
+        return items
 
 class GPTClient:
-    def __init__(self, model: str = "gpt-5"):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    """OpenAI client shared by the whole app.
+    
+    Sync calls go through a keep-alive httpx pool; the a*-prefixed methods use an AsyncOpenAI
+    client. Both sides share the response cache, the concurrency limit and the token-bucket
+    rate limiter. Prompt templates are loaded and checked once, at construction.
+    """
+    
+    def __init__(self, model: str = "gpt-5", cache: Optional[ResponseCache] = None,
+                 base_url: Optional[str] = None, timeout: float = 60.0, max_connections: int = 20,
+                 max_concurrency: int = 8, requests_per_second: float = 0.0, burst: float = 5.0):
+        import httpx
+        from openai import OpenAI
+        
         self.model = model
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60.0
+        )
+        self.client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=base_url,
+            timeout=timeout,
+            http_client=httpx.Client(limits=self.limits, timeout=timeout)
+        )
+        self._async_client: Optional["AsyncOpenAI"] = None
         self.prompts_dir = Path(__file__).parent.parent / "prompts"
+        self.prompts = self._compile_prompts()
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        
+        self.max_concurrency = max_concurrency
+        self._concurrency = threading.BoundedSemaphore(max_concurrency)
+        self._async_concurrency: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+    
+    @classmethod
+    def from_env(cls) -> "GPTClient":
+        return cls(
+            model=os.getenv("OPENAI_MODEL", "gpt-5"),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", 60)),
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", 20)),
+            max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", 8)),
+            requests_per_second=float(os.getenv("OPENAI_RATE_LIMIT_PER_SECOND", 0)),
+            burst=float(os.getenv("OPENAI_RATE_LIMIT_BURST", 5))
+        )
+    
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        if self._async_client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=self.base_url,
+                timeout=self.timeout,
+                http_client=httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            )
+        return self._async_client
+    
+    def _compile_prompts(self) -> Dict[str, str]:
+        # Parse every template now so a malformed prompt fails at startup, not mid-request
+        prompts = {}
+        for prompt_path in sorted(self.prompts_dir.glob("*.txt")):
+            template = prompt_path.read_text()
+            list(string.Formatter().parse(template))
+            prompts[prompt_path.stem] = template
+        return prompts
     
     def _load_prompt(self, prompt_name: str) -> str:
-        prompt_path = self.prompts_dir / f"{prompt_name}.txt"
-        with open(prompt_path, 'r') as f:
-            return f.read()
+        return self.prompts[prompt_name]
+    
+    def _call_gpt(self, system_message: str, user_prompt: str, use_json: bool = True,
+                  prompt_name: Optional[str] = None, cache_context: Optional[Dict] = None) -> Dict:
+        start = time.perf_counter()
+        cache_key = self._cache_key(system_message, user_prompt, use_json, prompt_name, cache_context)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                CALL_SECONDS.observe(time.perf_counter() - start, prompt=prompt_name, outcome="hit")
+                return cached
+        
+        try:
+            result = self._request_gpt(system_message, user_prompt, use_json)
+        except Exception:
+            CALL_SECONDS.observe(time.perf_counter() - start, prompt=prompt_name, outcome="error")
+            raise
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        CALL_SECONDS.observe(time.perf_counter() - start, prompt=prompt_name, outcome="miss")
+        return result
+    
+    async def _acall_gpt(self, system_message: str, user_prompt: str, use_json: bool = True,
+                         prompt_name: Optional[str] = None, cache_context: Optional[Dict] = None) -> Dict:
+        start = time.perf_counter()
+        cache_key = self._cache_key(system_message, user_prompt, use_json, prompt_name, cache_context)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                CALL_SECONDS.observe(time.perf_counter() - start, prompt=prompt_name, outcome="hit")
+                return cached
+        
+        try:
+            result = await self._arequest_gpt(system_message, user_prompt, use_json)
+        except Exception:
+            CALL_SECONDS.observe(time.perf_counter() - start, prompt=prompt_name, outcome="error")
+            raise
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        CALL_SECONDS.observe(time.perf_counter() - start, prompt=prompt_name, outcome="miss")
+        return result
+    
+    def _cache_key(self, system_message: str, user_prompt: str, use_json: bool,
+                   prompt_name: Optional[str], cache_context: Optional[Dict]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return ResponseCache.make_key(
+            model=self.model,
+            prompt_name=prompt_name,
+            system_message=system_message,
+            user_prompt=user_prompt,
+            use_json=use_json,
+            context=cache_context
+        )
     
-    def _call_gpt(self, system_message: str, user_prompt: str, use_json: bool = True) -> Dict:
+    def _request_kwargs(self, system_message: str, user_prompt: str, use_json: bool) -> Dict:
         messages = [
             {"role": "system", "content": system_message},
             {"role": "user", "content": user_prompt}
@@ -27,14 +200,63 @@ class GPTClient:
         kwargs = {"model": self.model, "messages": messages}
         if use_json:
             kwargs["response_format"] = {"type": "json_object"}
-        
-        response = self.client.chat.completions.create(**kwargs)
-        
+        return kwargs
+    
+    def _parse_response(self, response, use_json: bool) -> Dict:
+        if response.usage is not None:
+            TOKENS.inc(response.usage.prompt_tokens, model=self.model, type="prompt")
+            TOKENS.inc(response.usage.completion_tokens, model=self.model, type="completion")
         if use_json:
             return json.loads(response.choices[0].message.content)
         return {"response": response.choices[0].message.content}
     
-    def categorize_note(self, title: str, body: str, existing_categories: list) -> Dict:
+    def _request_gpt(self, system_message: str, user_prompt: str, use_json: bool = True) -> Dict:
+        kwargs = self._request_kwargs(system_message, user_prompt, use_json)
+        self.rate_limiter.acquire()
+        with self._concurrency:
+            response = self.client.chat.completions.create(**kwargs)
+        return self._parse_response(response, use_json)
+    
+    async def _arequest_gpt(self, system_message: str, user_prompt: str, use_json: bool = True) -> Dict:
+        kwargs = self._request_kwargs(system_message, user_prompt, use_json)
+        await self.rate_limiter.acquire_async()
+        loop = asyncio.get_running_loop()
+        # asyncio primitives belong to one event loop, so keep a semaphore per loop
+        semaphore = self._async_concurrency.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+        async with semaphore:
+            response = await self.async_client.chat.completions.create(**kwargs)
+        return self._parse_response(response, use_json)
+    
+    def _stream_gpt(self, system_message: str, user_prompt: str, use_json: bool = True) -> Iterator[str]:
+        kwargs = self._request_kwargs(system_message, user_prompt, use_json)
+        kwargs["stream"] = True
+        
+        self.rate_limiter.acquire()
+        with self._concurrency:
+            for chunk in self.client.chat.completions.create(**kwargs):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
+    def _stream_gpt_items(self, system_message: str, user_prompt: str, array_key: str,
+                          prompt_name: Optional[str] = None, cache_context: Optional[Dict] = None) -> Iterator[Dict]:
+        """Yield each element of the JSON response's array_key list as soon as it has fully arrived."""
+        cache_key = self._cache_key(system_message, user_prompt, True, prompt_name, cache_context)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield from cached.get(array_key, [])
+                return
+        
+        parser = _ArrayItemParser()
+        chunks = []
+        for delta in self._stream_gpt(system_message, user_prompt, use_json=True):
+            chunks.append(delta)
+            yield from parser.feed(delta)
+        
+        if cache_key is not None:
+            self.cache.set(cache_key, json.loads(''.join(chunks)))
+    
+    def _categorize_request(self, title: str, body: str, existing_categories: list) -> Dict:
         prompt_template = self._load_prompt("categorize_note")
         user_prompt = prompt_template.format(
             title=title,
@@ -42,34 +264,98 @@ class GPTClient:
             existing_categories=', '.join(existing_categories) if existing_categories else 'None yet'
         )
         
-        return self._call_gpt(
+        return dict(
             system_message="You are a helpful assistant that categorizes inspiration notes.",
             user_prompt=user_prompt,
-            use_json=True
+            use_json=True,
+            prompt_name="categorize_note",
+            cache_context={"existing_categories": existing_categories}
         )
     
-    def classify_note(self, title: str, body: str) -> Dict:
+    def _classify_request(self, title: str, body: str) -> Dict:
         prompt_template = self._load_prompt("classify_note")
         user_prompt = prompt_template.format(
             title=title,
             body=body
         )
         
-        return self._call_gpt(
+        return dict(
             system_message="You are a helpful assistant that classifies notes as inspiration or tasks.",
             user_prompt=user_prompt,
-            use_json=True
+            use_json=True,
+            prompt_name="classify_note"
         )
     
-    def translate_to_planner(self, title: str, body: str) -> Dict:
+    def _translate_request(self, title: str, body: str) -> Dict:
         prompt_template = self._load_prompt("translate_to_planner")
         user_prompt = prompt_template.format(
             title=title,
             body=body
         )
         
-        return self._call_gpt(
+        return dict(
             system_message="You are a helpful assistant that converts notes into planner tasks.",
             user_prompt=user_prompt,
-            use_json=True
+            use_json=True,
+            prompt_name="translate_to_planner",
+            # Suggested dates are relative to today, so a cached answer only holds for the day
+            cache_context={"date": date.today().isoformat()}
         )
+    
+    def _analyze_request(self, notes: List[Dict], existing_categories: list) -> Dict:
+        prompt_template = self._load_prompt("analyze_notes_batch")
+        user_prompt = prompt_template.format(
+            notes=json.dumps([{"id": n["id"], "title": n["title"], "body": n["body"]} for n in notes], indent=2),
+            existing_categories=', '.join(existing_categories) if existing_categories else 'None yet'
+        )
+        
+        return dict(
+            system_message="You are a helpful assistant that classifies notes as inspiration or tasks "
+                           "and categorizes inspiration notes.",
+            user_prompt=user_prompt,
+            use_json=True,
+            prompt_name="analyze_notes_batch",
+            cache_context={"existing_categories": existing_categories}
+        )
+    
+    def _analysis_results(self, result: Dict, notes: List[Dict]) -> List[Dict]:
+        note_ids = {n["id"] for n in notes}
+        return [r for r in result.get("results", []) if r.get("note_id") in note_ids]
+    
+    def categorize_note(self, title: str, body: str, existing_categories: list) -> Dict:
+        return self._call_gpt(**self._categorize_request(title, body, existing_categories))
+    
+    def classify_note(self, title: str, body: str) -> Dict:
+        return self._call_gpt(**self._classify_request(title, body))
+    
+    def translate_to_planner(self, title: str, body: str) -> Dict:
+        return self._call_gpt(**self._translate_request(title, body))
+    
+    def translate_to_planner_stream(self, title: str, body: str) -> Iterator[Dict]:
+        request = self._translate_request(title, body)
+        del request["use_json"]
+        return self._stream_gpt_items(array_key="suggestions", **request)
+    
+    def analyze_notes(self, notes: List[Dict], existing_categories: list) -> List[Dict]:
+        """Classify and categorize several notes with a single request; returns one result per note."""
+        result = self._call_gpt(**self._analyze_request(notes, existing_categories))
+        return self._analysis_results(result, notes)
+    
+    async def acategorize_note(self, title: str, body: str, existing_categories: list) -> Dict:
+        return await self._acall_gpt(**self._categorize_request(title, body, existing_categories))
+    
+    async def aclassify_note(self, title: str, body: str) -> Dict:
+        return await self._acall_gpt(**self._classify_request(title, body))
+    
+    async def atranslate_to_planner(self, title: str, body: str) -> Dict:
+        return await self._acall_gpt(**self._translate_request(title, body))
+    
+    async def aanalyze_notes(self, notes: List[Dict], existing_categories: list) -> List[Dict]:
+        result = await self._acall_gpt(**self._analyze_request(notes, existing_categories))
+        return self._analysis_results(result, notes)
+
+_client = Lazy(lambda: GPTClient.from_env())
+
+def get_gpt_client() -> GPTClient:
+    """Return the process-wide GPT client shared by all blueprints, creating it on first use."""
+    return _client.get()
@@ -0,0 +1,117 @@
+from typing import Dict, List, Mapping, Optional, Sequence
+
+from models.shared import DerivedIndex, Lazy
+from models.storage import get_storage
+
+class InspirationGroups(DerivedIndex):
+    """Inspiration notes grouped by category, as GET /api/inspirations/ returns them.
+
+    Built once from storage.get_inspirations_grouped(), then kept up to date from change
+    notifications: a created or deleted inspiration moves one entry, and an edited or
+    deleted note refreshes only the entries showing it. Each read first has storage check
+    for changes made by other processes, which arrive as reloads and rebuild the grouping.
+    """
+
+    collections = ("notes", "inspirations")
+
+    def __init__(self, storage):
+        super().__init__(storage)
+        self._stale = True
+        self._dirty_notes: set = set()
+        self._dirty_inspirations: set = set()
+
+        # category -> inspiration id -> entry (the note plus inspiration_id and ai_confidence)
+        self._groups: Dict[str, Dict[str, Dict]] = {}
+        self._categories: Dict[str, str] = {}
+        self._note_inspirations: Dict[str, set] = {}
+        # The grouping as last handed out; rebuilt from _groups after changes
+        self._grouped: Optional[Dict[str, List[Dict]]] = None
+
+        self._follow()
+
+    def _record_change(self, collection: str, put: Optional[Sequence[Mapping]], deleted: Sequence[str]):
+        if put is None:
+            self._stale = True
+            return
+        dirty = self._dirty_notes if collection == "notes" else self._dirty_inspirations
+        dirty.update(record["id"] for record in put)
+        dirty.update(deleted)
+
+    def grouped(self) -> Dict[str, List[Dict]]:
+        """The current grouping. It is shared by every caller until the next change, so
+        callers must not modify it."""
+        with self._lock:
+            self._refresh()
+            if self._grouped is None:
+                self._grouped = {category: list(entries.values()) for category, entries in self._groups.items()}
+            return self._grouped
+
+    def _refresh(self):
+        self.storage.refresh(self.collections)
+        with self._changes_lock:
+            stale, self._stale = self._stale, False
+            dirty_notes, self._dirty_notes = self._dirty_notes, set()
+            dirty_inspirations, self._dirty_inspirations = self._dirty_inspirations, set()
+
+        if stale:
+            self._rebuild()
+            return
+
+        # Read back the current records: deleted ones are simply no longer returned
+        for inspiration_id in dirty_inspirations:
+            self._remove(inspiration_id)
+        inspirations = self.storage.get_inspirations_by_ids(list(dirty_inspirations))
+        notes = {
+            note["id"]: note
+            for note in self.storage.get_notes_by_ids(list({i["note_id"] for i in inspirations} | dirty_notes))
+        }
+        for inspiration in inspirations:
+            note = notes.get(inspiration["note_id"])
+            if note:
+                self._add(inspiration["category"], {
+                    **note, 'inspiration_id': inspiration['id'], 'ai_confidence': inspiration['ai_confidence']
+                })
+        for note_id in dirty_notes:
+            note = notes.get(note_id)
+            for inspiration_id in list(self._note_inspirations.get(note_id, ())):
+                category = self._categories[inspiration_id]
+                entry = self._remove(inspiration_id)
+                if note:
+                    self._add(category, {
+                        **note, 'inspiration_id': inspiration_id, 'ai_confidence': entry['ai_confidence']
+                    })
+
+    def _rebuild(self):
+        self._groups, self._categories, self._note_inspirations = {}, {}, {}
+        self._grouped = None
+        for category, entries in self.storage.get_inspirations_grouped().items():
+            for entry in entries:
+                self._add(category, entry)
+
+    def _add(self, category: str, entry: Dict):
+        inspiration_id = entry["inspiration_id"]
+        self._groups.setdefault(category, {})[inspiration_id] = entry
+        self._categories[inspiration_id] = category
+        self._note_inspirations.setdefault(entry["id"], set()).add(inspiration_id)
+        self._grouped = None
+
+    def _remove(self, inspiration_id: str) -> Optional[Dict]:
+        category = self._categories.pop(inspiration_id, None)
+        if category is None:
+            return None
+        group = self._groups[category]
+        entry = group.pop(inspiration_id)
+        if not group:
+            del self._groups[category]
+        ids = self._note_inspirations[entry["id"]]
+        ids.discard(inspiration_id)
+        if not ids:
+            del self._note_inspirations[entry["id"]]
+        self._grouped = None
+        return entry
+
+_groups = Lazy(lambda: InspirationGroups(get_storage()))
+
+def get_inspiration_groups() -> InspirationGroups:
+    """Return the process-wide inspiration grouping over the shared storage."""
+    return _groups.get()
@@ -0,0 +1,222 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from models.shared import Lazy
+
+# A handler takes the job's note_id and returns (response body, HTTP status)
+JobHandler = Callable[[str], Tuple[Dict, int]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    note_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_after REAL NOT NULL,
+    claimed_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, run_after);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active ON jobs (kind, note_id) WHERE status IN ('queued', 'running');
+"""
+
+class JobQueue:
+    """Persistent queue of AI jobs (generated/jobs.db) drained by a pool of worker threads.
+
+    Jobs are deduplicated per (kind, note_id) while queued or running, and no two jobs for
+    the same note run at once. Handlers raising one of retry_on are retried with exponential
+    backoff; running jobs whose worker died are picked up again after lease_seconds.
+    """
+
+    def __init__(self, path: str = "generated/jobs.db", workers: int = 4, max_attempts: int = 5,
+                 backoff_seconds: float = 2.0, lease_seconds: float = 600.0,
+                 retry_on: Tuple[type, ...] = ()):
+        self.path = Path(path)
+        self.path.parent.mkdir(exist_ok=True)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.retry_on = retry_on
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._threads = []
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def register(self, kind: str, handler: JobHandler):
+        self._handlers[kind] = handler
+
+    def start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def enqueue(self, kind: str, note_id: str) -> Dict:
+        """Queue a job, or return the job already queued or running for this note."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        conn = self._connect()
+        now = time.time()
+        try:
+            with conn:
+                job_id = str(uuid.uuid4())
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, note_id, status, run_after, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                    (job_id, kind, note_id, now, now, now)
+                )
+        except sqlite3.IntegrityError:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND note_id = ? AND status IN ('queued', 'running')",
+                (kind, note_id)
+            ).fetchone()
+            job_id = row["id"]
+
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "note_id": row["note_id"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        conn = self._connect()
+        now = time.time()
+        stale = now - self.lease_seconds
+        with conn:
+            # Take the write lock up front so concurrent claimers cannot both see a note as idle
+            conn.execute("BEGIN IMMEDIATE")
+            # Reclaim jobs whose worker disappeared without finishing them
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running' AND claimed_at < ?",
+                (now, stale)
+            )
+            # Only take kinds this process can run; another process may have registered more
+            kinds = list(self._handlers)
+            row = conn.execute(
+                f"SELECT * FROM jobs WHERE status = 'queued' AND run_after <= ? "
+                f"AND kind IN ({', '.join('?' * len(kinds))}) "
+                f"AND note_id NOT IN (SELECT note_id FROM jobs WHERE status = 'running') "
+                f"ORDER BY created_at LIMIT 1",
+                (now, *kinds)
+            ).fetchone()
+            if row is None:
+                return None
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, claimed_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, now, row["id"])
+            )
+        # Another worker process may have claimed it first
+        return row if cursor.rowcount else None
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None,
+                run_after: Optional[float] = None):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, run_after = COALESCE(?, run_after), "
+                "updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, run_after, now, job_id)
+            )
+
+    def _run(self, job: sqlite3.Row):
+        attempts = job["attempts"] + 1
+        try:
+            body, status_code = self._handlers[job["kind"]](job["note_id"])
+        except self.retry_on as e:
+            if attempts >= self.max_attempts:
+                self._finish(job["id"], "failed", error=str(e))
+                return
+            delay = self.backoff_seconds * 2 ** (attempts - 1) * (1 + random.random())
+            self._finish(job["id"], "queued", error=str(e), run_after=time.time() + delay)
+            return
+        except Exception as e:
+            self._finish(job["id"], "failed", error=str(e))
+            return
+
+        self._finish(job["id"], "succeeded" if status_code < 400 else "failed",
+                     result={"status_code": status_code, "body": body})
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.OperationalError:
+                job = None
+            if job is None:
+                self._wakeup.wait(timeout=1.0)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+_handlers: Dict[str, JobHandler] = {}
+
+def _create_queue() -> JobQueue:
+    from models.gpt_client import retryable_errors
+    queue = JobQueue(
+        path=os.getenv("JOB_QUEUE_PATH", "generated/jobs.db"),
+        workers=int(os.getenv("JOB_QUEUE_WORKERS", 4)),
+        max_attempts=int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", 5)),
+        retry_on=retryable_errors()
+    )
+    for kind, handler in _handlers.items():
+        queue.register(kind, handler)
+    queue.start()
+    return queue
+
+_queue = Lazy(_create_queue)
+
+def register_job(kind: str, handler: JobHandler):
+    """Register the handler for jobs of kind with the shared queue, whether or not it exists yet."""
+    with _queue.lock:
+        _handlers[kind] = handler
+        queue = _queue.peek()
+        if queue is not None:
+            queue.register(kind, handler)
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, starting its workers on first use."""
+    return _queue.get()
@@ -0,0 +1,99 @@
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+class ReadWriteLock:
+    """Reader/writer lock shared by the threads of this process.
+    
+    The first reader takes a shared flock() on lock_path and a writer takes an exclusive
+    one, so readers and writers in other worker processes are excluded as well. Both sides
+    are reentrant per thread; a thread holding the write lock may also read.
+    """
+    
+    def __init__(self, lock_path: Path):
+        self.lock_path = lock_path
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        self._local = threading.local()
+        self._lock_file = None
+        self._pid = None
+    
+    def _flock(self, operation: str):
+        if fcntl is None:
+            return
+        # A descriptor inherited across fork() shares its lock with the parent, so every
+        # worker process needs its own
+        if self._pid != os.getpid():
+            self._lock_file = open(self.lock_path, 'a')
+            self._pid = os.getpid()
+        fcntl.flock(self._lock_file.fileno(), getattr(fcntl, operation))
+    
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        depth = getattr(self._local, "read_depth", 0)
+        if self._writer == me or depth:
+            self._local.read_depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.read_depth = depth
+            return
+        
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            if self._readers == 0:
+                self._flock("LOCK_SH")
+            self._readers += 1
+        self._local.read_depth = 1
+        try:
+            yield
+        finally:
+            self._local.read_depth = 0
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._flock("LOCK_UN")
+                    self._cond.notify_all()
+    
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+            return
+        if getattr(self._local, "read_depth", 0):
+            raise RuntimeError("Cannot upgrade a read lock to a write lock")
+        
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._flock("LOCK_EX")
+            finally:
+                self._waiting_writers -= 1
+                self._cond.notify_all()
+            self._writer = me
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = None
+                self._flock("LOCK_UN")
+                self._cond.notify_all()
@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Sequence
+
+from models.records import Record
+from models.metrics import REGISTRY
+from models.storage import LocalStorage, _Collection, _writes, WRITE_BYTES, WRITE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+COMPACTION_FAILURES = REGISTRY.counter(
+    "storage_compaction_failures_total", "Background log compactions that raised", ["collection"]
+)
+
+class LogStorage(LocalStorage):
+    """LocalStorage that appends mutations to a JSON-lines log per collection.
+    
+    Each collection is its snapshot file (same format as LocalStorage, e.g. notes.json)
+    plus notes.log. Reads replay the log on top of the snapshot; a background thread
+    folds the log back into the snapshot once it outgrows it.
+    """
+    
+    # Shared by every instance so compaction never races an append in this process
+    _log_lock = threading.RLock()
+    
+    def __init__(self, base_path: str = "generated", compact_interval: float = 30.0,
+                 compact_min_bytes: int = 256 * 1024, storage_format: str = "json"):
+        self._log_offsets: Dict[Path, int] = {}
+        self.compact_interval = compact_interval
+        self.compact_min_bytes = compact_min_bytes
+        super().__init__(base_path, storage_format=storage_format)
+        
+        with self._lock.write():
+            for file_path in self._collections:
+                self._repair_log(self._log_path(file_path))
+        
+        self._compactor = threading.Thread(target=self._compact_loop, daemon=True)
+        self._compactor.start()
+    
+    def _log_path(self, file_path: Path) -> Path:
+        return file_path.with_suffix(".log")
+    
+    def _log_size(self, log_path: Path) -> int:
+        try:
+            return log_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+    
+    def _repair_log(self, log_path: Path):
+        # Drop a torn trailing record left behind by a crash mid-append
+        if not log_path.exists():
+            return
+        with open(log_path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+    
+    def _write_snapshot(self, file_path: Path, data):
+        tmp_path = file_path.with_suffix(file_path.suffix + ".tmp")
+        self._write_json(tmp_path, data)
+        with open(tmp_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    
+    def _collection(self, file_path: Path) -> _Collection:
+        with self._log_lock:
+            collection = self._collections[file_path]
+            log_path = self._log_path(file_path)
+            signature = self._file_signature(file_path)
+            log_size = self._log_size(log_path)
+            offset = self._log_offsets.get(file_path, 0)
+            
+            changed = collection.signature != signature or log_size < offset
+            if changed:
+                collection.load(self._read_json(file_path))
+                collection.signature = signature
+                offset = 0
+            if log_size > offset:
+                offset = self._replay(collection, log_path, offset)
+                changed = True
+            
+            self._log_offsets[file_path] = offset
+        
+        # Records changed without going through _save (startup, or another process wrote)
+        if changed:
+            self._notify(collection, None)
+        return collection
+    
+    def _replay(self, collection: _Collection, log_path: Path, offset: int) -> int:
+        with open(log_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        
+        # Only consume complete lines; a partial tail is still being written
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._apply(collection, json.loads(line))
+        return offset + end
+    
+    def _apply(self, collection: _Collection, entry: Dict):
+        if entry["op"] == "put":
+            collection.put(collection.record_type.from_dict(entry["record"]))
+        elif entry["op"] == "delete":
+            collection.remove(entry["id"])
+    
+    def _persist(self, collection: _Collection, put: Sequence[Record] = (), deleted: Sequence[str] = ()):
+        entries = [{"op": "put", "record": record.to_dict()} for record in put]
+        entries += [{"op": "delete", "id": record_id} for record_id in deleted]
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+        
+        with self._log_lock:
+            file_path = collection.path
+            offset = self._log_offsets.get(file_path, 0)
+            try:
+                with WRITE_SECONDS.time(collection=file_path.stem), open(self._log_path(file_path), 'ab') as f:
+                    f.write(data)
+                    f.flush()
+                    end = f.tell()
+            except Exception:
+                collection.signature = None
+                raise
+            WRITE_BYTES.inc(len(data), collection=file_path.stem)
+            
+            # If another process appended in between, leave the offset alone so the
+            # next read replays their records too (re-applying ours is idempotent)
+            if end == offset + len(data):
+                self._log_offsets[file_path] = end
+    
+    @_writes
+    def compact(self, file_path: Path):
+        with self._log_lock:
+            collection = self._collection(file_path)
+            self._write_snapshot(file_path, collection.all())
+            open(self._log_path(file_path), 'wb').close()
+            collection.signature = self._file_signature(file_path)
+            self._log_offsets[file_path] = 0
+    
+    def vacuum(self) -> Dict[str, int]:
+        removed = super().vacuum()
+        # Fold the deletions into the snapshots now rather than waiting for the compactor
+        for file_path in (self.links_file, self.inspirations_file):
+            self.compact(file_path)
+        return removed
+    
+    def _needs_compaction(self, file_path: Path) -> bool:
+        log_size = self._log_size(self._log_path(file_path))
+        return log_size >= max(self.compact_min_bytes, file_path.stat().st_size)
+    
+    def _compact_loop(self):
+        while True:
+            time.sleep(self.compact_interval)
+            for file_path in list(self._collections):
+                try:
+                    if self._needs_compaction(file_path):
+                        self.compact(file_path)
+                except Exception:
+                    # Keep compacting the other collections; this one is retried next interval
+                    COMPACTION_FAILURES.inc(collection=file_path.stem)
+                    logger.exception("Log compaction failed for %s", file_path.name)
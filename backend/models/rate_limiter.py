@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """Token-bucket rate limiter usable from threads and from asyncio code.
+    
+    Refills rate tokens per second up to capacity; a rate of 0 disables limiting.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+    
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+    
+    async def acquire_async(self):
+        if self.rate <= 0:
+            return
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
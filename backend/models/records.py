@@ -0,0 +1,137 @@
+import sys
+from collections.abc import Mapping
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+class Record(Mapping):
+    """Read-only view of one stored record.
+
+    Collections hold each record as a plain tuple of its JSON values in field_names order,
+    with strings drawn from a small set (statuses, view types, dates) interned: unlike dicts
+    with repeated keys or slotted instances, such tuples are compact and get untracked by the
+    garbage collector. A Record wraps one such tuple (packed). record.title and
+    record["title"] are the same value, so callers that treated records as dicts keep
+    working, and to_dict() only has to pair the values with their field names.
+    """
+
+    __slots__ = ("packed",)
+
+    field_names: Tuple[str, ...] = ()
+    # Fields whose values are interned, so every record shares one string object per value
+    interned: Tuple[str, ...] = ()
+    # field -> position in packed, and the positions of interned fields; filled in by _record
+    positions: Dict[str, int] = {}
+    _interned_positions: Tuple[int, ...] = ()
+    # Values of a dict in field order, and the dict built back from them (see _record)
+    _values: Callable[[Mapping], tuple]
+    _as_dict: Callable[..., Dict[str, Any]]
+
+    def __init__(self, packed: tuple):
+        self.packed = packed
+
+    @classmethod
+    def pack(cls, field: str, value: Any) -> Any:
+        """value as stored in field."""
+        return _intern(value) if field in cls.interned else value
+
+    @classmethod
+    def create(cls, **values) -> "Record":
+        """Build a record from field values (see pack); missing fields are None."""
+        return cls(tuple(values.get(field) for field in cls.field_names))
+
+    @classmethod
+    def pack_dict(cls, data: Mapping) -> tuple:
+        """The packed tuple of a record given in its JSON form."""
+        try:
+            values = cls._values(data)
+        except KeyError:
+            # Written before one of the fields existed
+            values = tuple(map(data.get, cls.field_names))
+        if not cls._interned_positions:
+            return values
+        values = list(values)
+        for position in cls._interned_positions:
+            values[position] = _intern(values[position])
+        return tuple(values)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Record":
+        return cls(cls.pack_dict(data))
+
+    def replace(self, changes: Dict[str, Any]) -> "Record":
+        """A copy of this record with changes (stored values, see pack) applied."""
+        values = list(self.packed)
+        for field, value in changes.items():
+            values[self.positions[field]] = value
+        return type(self)(tuple(values))
+
+    def __getitem__(self, field: str) -> Any:
+        return self.packed[self.positions[field]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.field_names)
+
+    def __len__(self) -> int:
+        return len(self.field_names)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._as_dict(*self.packed)
+
+def as_rows(values: List[Any]) -> List[Any]:
+    """values with its records in their JSON form, converted in one pass when they are all
+    records of one type (as list routes return); other lists are returned as given."""
+    kinds = set(map(type, values))
+    if len(kinds) != 1:
+        return values
+    kind = kinds.pop()
+    if not issubclass(kind, Record):
+        return values
+    as_dict = kind._as_dict
+    return [as_dict(*record.packed) for record in values]
+
+def _record(cls):
+    cls.positions = {field: position for position, field in enumerate(cls.field_names)}
+    cls._interned_positions = tuple(cls.positions[field] for field in cls.interned)
+    cls._values = staticmethod(itemgetter(*cls.field_names))
+    # A generated lambda id, title, ...: {"id": id, "title": title, ...}, like namedtuple's
+    # generated methods: a dict display builds the dict about twice as fast as dict(zip())
+    parameters = ", ".join(cls.field_names)
+    items = ", ".join(f"{field!r}: {field}" for field in cls.field_names)
+    cls._as_dict = staticmethod(eval(f"lambda {parameters}: {{{items}}}"))
+    for position, field in enumerate(cls.field_names):
+        setattr(cls, field, property(lambda self, position=position: self.packed[position]))
+    return cls
+
+@_record
+class Note(Record):
+    __slots__ = ()
+    field_names = ("id", "title", "body", "is_inspiration", "is_analyzed", "created_at", "updated_at")
+
+@_record
+class PlannerItem(Record):
+    __slots__ = ()
+    field_names = ("id", "title", "body", "date", "time", "view_type", "status", "created_at", "updated_at")
+    interned = ("date", "time", "view_type", "status")
+
+@_record
+class Inspiration(Record):
+    __slots__ = ()
+    field_names = ("id", "note_id", "category", "ai_confidence", "created_at")
+    interned = ("category",)
+
+@_record
+class Category(Record):
+    __slots__ = ()
+    field_names = ("id", "name", "status", "discovered_by", "created_at")
+    interned = ("status", "discovered_by")
+
+@_record
+class Link(Record):
+    __slots__ = ()
+    field_names = ("id", "note_id", "planner_item_id", "created_at")
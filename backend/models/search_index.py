@@ -0,0 +1,231 @@
+import atexit
+import heapq
+import json
+import math
+import os
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.shared import DerivedIndex, Lazy
+from models.similarity import tokenize
+from models.storage import get_storage
+
+# Storage collection -> result type
+COLLECTIONS = {"notes": "note", "planner_items": "planner_item"}
+
+INDEX_VERSION = 1
+
+class SearchIndex(DerivedIndex):
+    """Inverted index over note and planner item titles/bodies, ranked with BM25.
+
+    Query terms also match indexed terms they are a prefix of, at prefix_weight. The index
+    follows storage change notifications and is saved to path shortly after it changes; on
+    first use it is loaded from there and reconciled with storage by updated_at.
+    """
+
+    k1 = 1.2
+    b = 0.75
+    prefix_weight = 0.5
+    max_expansions = 50
+    save_delay = 5.0
+    collections = tuple(COLLECTIONS)
+
+    def __init__(self, storage, path: str):
+        super().__init__(storage)
+        self.path = Path(path)
+
+        self._loaded = False
+        self._stale = False
+        # doc key -> latest record, or None once deleted
+        self._pending: Dict[str, Optional[Dict]] = {}
+
+        # doc key ("note:<id>") -> (updated_at, length, term counts)
+        self._documents: Dict[str, Tuple[str, int, Dict[str, int]]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        # Sorted vocabulary for prefix lookups
+        self._terms: List[str] = []
+        self._total_length = 0
+
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+
+        self._follow()
+        atexit.register(self.save)
+
+    def _record_change(self, collection: str, put: Optional[Sequence[Dict]], deleted: Sequence[str]):
+        if put is None:
+            self._stale = True
+            return
+        doc_type = COLLECTIONS[collection]
+        for record in put:
+            self._pending[f"{doc_type}:{record['id']}"] = record
+        for record_id in deleted:
+            self._pending[f"{doc_type}:{record_id}"] = None
+
+    def search(self, query: str, doc_type: Optional[str] = None, limit: int = 20) -> List[Tuple[str, str, float]]:
+        """Return up to limit (type, id, score) tuples, best match first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            self._refresh()
+            if not self._documents:
+                return []
+
+            count = len(self._documents)
+            average_length = self._total_length / count or 1.0
+            scores: Dict[str, float] = {}
+            for term in terms:
+                # A document scores once per query term, through its best matching indexed term
+                best: Dict[str, float] = {}
+                for candidate in self._expand(term):
+                    postings = self._postings[candidate]
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    weight = idf if candidate == term else idf * self.prefix_weight
+                    for key, tf in postings.items():
+                        length = self._documents[key][1]
+                        score = weight * tf * (self.k1 + 1) / (
+                            tf + self.k1 * (1 - self.b + self.b * length / average_length))
+                        if score > best.get(key, 0.0):
+                            best[key] = score
+                for key, score in best.items():
+                    scores[key] = scores.get(key, 0.0) + score
+
+        if doc_type:
+            prefix = f"{doc_type}:"
+            scores = {key: score for key, score in scores.items() if key.startswith(prefix)}
+
+        results = []
+        for key, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+            result_type, record_id = key.split(":", 1)
+            results.append((result_type, record_id, score))
+        return results
+
+    def _expand(self, term: str) -> List[str]:
+        start = bisect_left(self._terms, term)
+        end = min(start + self.max_expansions, len(self._terms))
+        expansions = []
+        for candidate in self._terms[start:end]:
+            if not candidate.startswith(term):
+                break
+            expansions.append(candidate)
+        return expansions
+
+    def _refresh(self):
+        with self._changes_lock:
+            stale, self._stale = self._stale, False
+            pending, self._pending = self._pending, {}
+
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+            stale = True
+        if stale:
+            # Pending changes were persisted before being reported, so a full sync covers them
+            self._sync()
+            return
+
+        for key, record in pending.items():
+            if record is None:
+                self._unindex(key)
+            else:
+                self._index(key, record)
+        if pending:
+            self._schedule_save()
+
+    def _sync(self):
+        current = {}
+        for doc_type, records in (("note", self.storage.get_notes()),
+                                  ("planner_item", self.storage.get_planner_items())):
+            for record in records:
+                current[f"{doc_type}:{record['id']}"] = record
+
+        changed = False
+        for key in [key for key in self._documents if key not in current]:
+            self._unindex(key)
+            changed = True
+        for key, record in current.items():
+            document = self._documents.get(key)
+            if document is None or document[0] != record.get("updated_at"):
+                self._index(key, record)
+                changed = True
+        if changed:
+            self._schedule_save()
+
+    def _index(self, key: str, record: Dict):
+        self._unindex(key)
+        terms = Counter(tokenize(f"{record.get('title', '')} {record.get('body', '')}"))
+        self._add(key, record.get("updated_at"), dict(terms))
+
+    def _add(self, key: str, updated_at: str, terms: Dict[str, int]):
+        length = sum(terms.values())
+        self._documents[key] = (updated_at, length, terms)
+        self._total_length += length
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[key] = tf
+
+    def _unindex(self, key: str):
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        self._total_length -= document[1]
+        for term in document[2]:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        for key, (updated_at, terms) in data["documents"].items():
+            self._add(key, updated_at, terms)
+
+    def _schedule_save(self):
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def save(self):
+        with self._lock:
+            self._save_timer = None
+            if not self._dirty:
+                return
+            data = json.dumps({
+                "version": INDEX_VERSION,
+                "documents": {key: [doc[0], doc[2]] for key, doc in self._documents.items()}
+            })
+            self._dirty = False
+
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+
+def _create_index() -> SearchIndex:
+    storage = get_storage()
+    return SearchIndex(storage, path=os.getenv(
+        "SEARCH_INDEX_PATH", str(Path(storage.base_path) / "search_index.json")
+    ))
+
+_index = Lazy(_create_index)
+
+def get_search_index() -> SearchIndex:
+    """Return the process-wide search index over the shared storage."""
+    return _index.get()
@@ -0,0 +1,73 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+class JSONCodec:
+    """Pretty-printed JSON via the standard library, the original on-disk format."""
+
+    name = "json"
+
+    def encode(self, data: Any) -> bytes:
+        return json.dumps(data, indent=2).encode()
+
+    def decode(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+class OrjsonCodec:
+    """Compact JSON via orjson."""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise RuntimeError("STORAGE_FORMAT=orjson requires the orjson package")
+
+    def encode(self, data: Any) -> bytes:
+        return orjson.dumps(data)
+
+    def decode(self, raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+class MsgpackCodec:
+    """MessagePack via msgpack."""
+
+    name = "msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("STORAGE_FORMAT=msgpack requires the msgpack package")
+
+    def encode(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, raw: bytes) -> Any:
+        return msgpack.unpackb(raw, raw=False)
+
+CODECS = {codec.name: codec for codec in (JSONCodec, OrjsonCodec, MsgpackCodec)}
+
+def get_codec(name: str):
+    if name not in CODECS:
+        raise ValueError(f"Unknown storage format: {name} (expected one of {', '.join(CODECS)})")
+    return CODECS[name]()
+
+def decode(raw: bytes) -> Any:
+    """Decode data written by any codec.
+
+    JSON documents start with '[', '{' or whitespace, none of which can start a MessagePack
+    array or map, so the first byte tells the formats apart.
+    """
+    head = raw[:1]
+    if head in (b"[", b"{") or head.isspace():
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if msgpack is None:
+        raise RuntimeError("Reading MessagePack data requires the msgpack package")
+    return msgpack.unpackb(raw, raw=False)
@@ -0,0 +1,63 @@
+import threading
+from typing import Callable, Generic, Mapping, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+class Lazy(Generic[T]):
+    """A process-wide instance, created by factory on first get().
+
+    The instance is read without the lock once it exists, since blueprints resolve their
+    LocalProxy on every attribute access. factory runs under lock and must finish setting
+    the instance up before returning, because other threads may use it right after.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self.lock = threading.Lock()
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self.lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    def peek(self) -> Optional[T]:
+        """The instance if it was already created, without creating it."""
+        return self._instance
+
+    def set(self, instance: T):
+        """Install instance in place of the factory's, e.g. a stub for benchmarks."""
+        with self.lock:
+            self._instance = instance
+
+class DerivedIndex:
+    """Base for in-memory indexes derived from storage that follow its change notifications.
+
+    The listener only records what changed, under _changes_lock: it may run while storage
+    is locked for writing, so it must neither read storage nor wait for _lock, which is
+    held while the index catches up with those changes (reading storage) and is queried.
+    """
+
+    # Collections whose changes are passed to _record_change
+    collections: Tuple[str, ...] = ()
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._changes_lock = threading.Lock()
+
+    def _follow(self):
+        # Called by subclasses once the state _record_change touches exists
+        self.storage.subscribe(self._on_change)
+
+    def _on_change(self, collection: str, put: Optional[Sequence[Mapping]], deleted: Sequence[str]):
+        if collection in self.collections:
+            with self._changes_lock:
+                self._record_change(collection, put, deleted)
+
+    def _record_change(self, collection: str, put: Optional[Sequence[Mapping]], deleted: Sequence[str]):
+        raise NotImplementedError
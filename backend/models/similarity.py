@@ -0,0 +1,183 @@
+import math
+import os
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+# numpy is imported by the methods that need it, so search (which shares tokenize) does not pay for it
+if TYPE_CHECKING:
+    import numpy as np
+
+from models.shared import DerivedIndex, Lazy
+from models.storage import get_storage
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i in is it its me my of on or so that the this
+to was we were will with you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+class CategorySimilarityIndex(DerivedIndex):
+    """TF-IDF index over inspiration notes, used to categorize near-duplicates without GPT.
+
+    Each inspiration is a document (its note's title and body) labelled with its category.
+    Storage change notifications only mark notes dirty; the affected documents and the CSR
+    matrix (indptr/indices/data) are rebuilt lazily on the next match().
+    """
+
+    collections = ("notes", "inspirations")
+
+    def __init__(self, storage, threshold: float = 0.85):
+        super().__init__(storage)
+        self.threshold = threshold
+
+        self._vocabulary: Dict[str, int] = {}
+        # inspiration id -> (note id, category, term ids, term counts)
+        self._documents: Dict[str, Tuple[str, str, "np.ndarray", "np.ndarray"]] = {}
+        self._note_documents: Dict[str, set] = {}
+        self._matrix = None
+
+        self._stale = True
+        self._dirty_notes: set = set()
+        self._removed: set = set()
+
+        self._follow()
+
+    def _record_change(self, collection: str, put: Optional[Sequence[Dict]], deleted: Sequence[str]):
+        if put is None:
+            self._stale = True
+        elif collection == "notes":
+            self._dirty_notes.update(note["id"] for note in put)
+            self._dirty_notes.update(deleted)
+        else:
+            self._dirty_notes.update(inspiration["note_id"] for inspiration in put)
+            self._removed.update(deleted)
+
+    def match(self, title: str, body: str, categories: Optional[Sequence[str]] = None,
+              exclude_note_id: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Return (category, cosine similarity) of the closest inspiration, or None if nothing matches."""
+        terms = tokenize(f"{title} {body}")
+        if not terms:
+            return None
+        import numpy as np
+
+        with self._lock:
+            self._refresh()
+            if self._matrix is None:
+                return None
+            indptr, indices, data, idf, doc_notes, doc_categories = self._matrix
+
+            query = np.zeros(len(idf))
+            unknown = {}
+            for term, count in zip(*np.unique(terms, return_counts=True)):
+                weight = 1 + math.log(count)
+                column = self._vocabulary.get(term)
+                if column is None or column >= len(idf):
+                    unknown[term] = weight
+                else:
+                    query[column] = weight * idf[column]
+            # Terms no inspiration uses still count against similarity, at the highest idf
+            unseen_idf = math.log(len(doc_notes) + 1) + 1
+            norm = math.sqrt(float(query @ query) + sum((w * unseen_idf) ** 2 for w in unknown.values()))
+
+            scores = np.add.reduceat(data * query[indices], indptr[:-1]) / norm
+            if exclude_note_id is not None:
+                scores[doc_notes == exclude_note_id] = -1.0
+            if categories is not None:
+                scores[~np.isin(doc_categories, list(categories))] = -1.0
+
+            best = int(np.argmax(scores))
+            if scores[best] <= 0:
+                return None
+            return str(doc_categories[best]), float(scores[best])
+
+    def _refresh(self):
+        with self._changes_lock:
+            stale, self._stale = self._stale, False
+            dirty, self._dirty_notes = self._dirty_notes, set()
+            removed, self._removed = self._removed, set()
+
+        if stale:
+            self._rebuild()
+        elif dirty or removed:
+            for inspiration_id in removed:
+                self._remove_document(inspiration_id)
+            for note_id in dirty:
+                for inspiration_id in list(self._note_documents.get(note_id, ())):
+                    self._remove_document(inspiration_id)
+                note = self.storage.get_note(note_id)
+                if note:
+                    for inspiration in self.storage.get_inspirations_by_note(note_id):
+                        self._add_document(inspiration, note)
+            self._build_matrix()
+
+    def _rebuild(self):
+        self._vocabulary = {}
+        self._documents = {}
+        self._note_documents = {}
+        inspirations = self.storage.get_inspirations()
+        notes = {
+            note["id"]: note
+            for note in self.storage.get_notes_by_ids(list({i["note_id"] for i in inspirations}))
+        }
+        for inspiration in inspirations:
+            note = notes.get(inspiration["note_id"])
+            if note:
+                self._add_document(inspiration, note)
+        self._build_matrix()
+
+    def _add_document(self, inspiration: Dict, note: Dict):
+        terms = tokenize(f"{note['title']} {note['body']}")
+        if not terms:
+            return
+        import numpy as np
+        words, counts = np.unique(terms, return_counts=True)
+        term_ids = np.array([self._vocabulary.setdefault(w, len(self._vocabulary)) for w in words])
+        self._documents[inspiration["id"]] = (note["id"], inspiration["category"], term_ids, counts)
+        self._note_documents.setdefault(note["id"], set()).add(inspiration["id"])
+
+    def _remove_document(self, inspiration_id: str):
+        document = self._documents.pop(inspiration_id, None)
+        if document is None:
+            return
+        ids = self._note_documents.get(document[0])
+        if ids is not None:
+            ids.discard(inspiration_id)
+            if not ids:
+                del self._note_documents[document[0]]
+
+    def _build_matrix(self):
+        if not self._documents:
+            self._matrix = None
+            return
+        import numpy as np
+
+        documents = list(self._documents.values())
+        lengths = np.array([len(doc[2]) for doc in documents])
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        indices = np.concatenate([doc[2] for doc in documents])
+        tf = 1 + np.log(np.concatenate([doc[3] for doc in documents]))
+
+        df = np.bincount(indices, minlength=len(self._vocabulary))
+        idf = np.log((1 + len(documents)) / (1 + df)) + 1
+
+        # L2-normalise each row so a dot product with the query is a cosine similarity
+        data = tf * idf[indices]
+        norms = np.sqrt(np.add.reduceat(data * data, indptr[:-1]))
+        data /= np.repeat(norms, lengths)
+
+        doc_notes = np.array([doc[0] for doc in documents], dtype=object)
+        doc_categories = np.array([doc[1] for doc in documents], dtype=object)
+        self._matrix = (indptr, indices, data, idf, doc_notes, doc_categories)
+
+_index = Lazy(lambda: CategorySimilarityIndex(
+    get_storage(),
+    threshold=float(os.getenv("SIMILARITY_THRESHOLD", 0.85))
+))
+
+def get_similarity_index() -> CategorySimilarityIndex:
+    """Return the process-wide similarity index over the shared storage."""
+    return _index.get()
@@ -0,0 +1,508 @@
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.storage import IMMUTABLE_FIELDS, ChangeListener
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    is_inspiration INTEGER NOT NULL DEFAULT 0,
+    is_analyzed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes (created_at, id);
+
+CREATE TABLE IF NOT EXISTS planner_items (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT,
+    view_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_planner_items_date ON planner_items (date);
+CREATE INDEX IF NOT EXISTS idx_planner_items_view_type ON planner_items (view_type, date);
+CREATE INDEX IF NOT EXISTS idx_planner_items_status ON planner_items (status, date);
+
+CREATE TABLE IF NOT EXISTS inspirations (
+    id TEXT PRIMARY KEY,
+    note_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    ai_confidence REAL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_inspirations_note_id ON inspirations (note_id);
+
+CREATE TABLE IF NOT EXISTS inspiration_categories (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    discovered_by TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_inspiration_categories_status ON inspiration_categories (status);
+
+CREATE TABLE IF NOT EXISTS links (
+    id TEXT PRIMARY KEY,
+    note_id TEXT NOT NULL,
+    planner_item_id TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_links_note_id ON links (note_id, planner_item_id);
+CREATE INDEX IF NOT EXISTS idx_links_planner_item_id ON links (planner_item_id);
+"""
+
+COLUMNS = {
+    "notes": ["id", "title", "body", "is_inspiration", "is_analyzed", "created_at", "updated_at"],
+    "planner_items": ["id", "title", "body", "date", "time", "view_type", "status", "created_at", "updated_at"],
+    "inspirations": ["id", "note_id", "category", "ai_confidence", "created_at"],
+    "inspiration_categories": ["id", "name", "status", "discovered_by", "created_at"],
+    "links": ["id", "note_id", "planner_item_id", "created_at"],
+}
+
+BOOLEAN_COLUMNS = {"is_inspiration", "is_analyzed"}
+
+# Every write to a table, by any connection, bumps its version, so refresh() can tell when
+# another process changed it
+VERSIONS_SCHEMA = "CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL);\n"
+for _table in COLUMNS:
+    VERSIONS_SCHEMA += f"INSERT OR IGNORE INTO table_versions (name, version) VALUES ('{_table}', 0);\n"
+    for _op in ("INSERT", "UPDATE", "DELETE"):
+        VERSIONS_SCHEMA += (
+            f"CREATE TRIGGER IF NOT EXISTS {_table}_{_op.lower()}_version AFTER {_op} ON {_table} "
+            f"BEGIN UPDATE table_versions SET version = version + 1 WHERE name = '{_table}'; END;\n"
+        )
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+MAX_IN_PARAMS = 500
+
+class SQLiteStorage:
+    """Drop-in alternative to LocalStorage backed by a single SQLite database in WAL mode."""
+
+    def __init__(self, base_path: str = "generated", db_name: str = "storage.db"):
+        self.base_path = Path(base_path)
+        self.base_path.mkdir(exist_ok=True)
+        self.db_path = self.base_path / db_name
+        self._local = threading.local()
+        self._listeners: List[ChangeListener] = []
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            conn.executescript(VERSIONS_SCHEMA)
+        # Table versions as of the last change this instance made or reported
+        self._versions_lock = threading.Lock()
+        self._seen_versions = self._table_versions(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _table_versions(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        return dict(conn.execute("SELECT name, version FROM table_versions").fetchall())
+
+    @contextmanager
+    def _committing(self, conn: sqlite3.Connection):
+        # Take the write lock up front, so the versions read here are bumped only by our statements
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = self._table_versions(conn)
+            yield
+            after = self._table_versions(conn)
+        with self._versions_lock:
+            for table, version in after.items():
+                if self._seen_versions.get(table) == before[table]:
+                    self._seen_versions[table] = version
+
+    @contextmanager
+    def _writing(self):
+        # Commit per statement group unless an enclosing transaction() will commit for us
+        conn = self._connect()
+        if getattr(self._local, "in_transaction", False):
+            yield conn
+            return
+        with self._committing(conn):
+            yield conn
+
+    @contextmanager
+    def transaction(self):
+        """Apply every mutation in the block in a single SQLite transaction."""
+        conn = self._connect()
+        if getattr(self._local, "in_transaction", False):
+            yield self
+            return
+
+        self._local.in_transaction = True
+        self._local.pending = []
+        try:
+            with self._committing(conn):
+                yield self
+        finally:
+            self._local.in_transaction = False
+            pending, self._local.pending = self._local.pending, []
+        for table, put, deleted in pending:
+            self._notify(table, put, deleted)
+
+    def subscribe(self, listener: ChangeListener):
+        """Register a callback for changes made through this instance (see ChangeListener)."""
+        self._listeners.append(listener)
+
+    def refresh(self, tables: Sequence[str]):
+        """Report the named tables to listeners as reloaded if another connection (e.g. another
+        process) wrote to them since this instance last looked."""
+        versions = self._table_versions(self._connect())
+        with self._versions_lock:
+            changed = [table for table in tables
+                       if table in versions and versions[table] != self._seen_versions.get(table)]
+            for table in changed:
+                self._seen_versions[table] = versions[table]
+        for table in changed:
+            self._notify(table, None)
+
+    def _notify(self, table: str, put: Optional[Sequence[Dict]], deleted: Sequence[str] = ()):
+        # Hold notifications until the enclosing transaction commits; a rollback discards them
+        if getattr(self._local, "in_transaction", False):
+            self._local.pending.append((table, put, deleted))
+            return
+        for listener in self._listeners:
+            listener(table, put, deleted)
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict:
+        record = dict(row)
+        for column in BOOLEAN_COLUMNS & record.keys():
+            record[column] = bool(record[column])
+        return record
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict]:
+        return [self._to_dict(row) for row in self._connect().execute(sql, params)]
+
+    def _query_one(self, sql: str, params: tuple = ()) -> Optional[Dict]:
+        row = self._connect().execute(sql, params).fetchone()
+        return self._to_dict(row) if row else None
+
+    def _get_by_ids(self, table: str, record_ids: Sequence[str]) -> List[Dict]:
+        found = {}
+        record_ids = list(record_ids)
+        for start in range(0, len(record_ids), MAX_IN_PARAMS):
+            chunk = record_ids[start:start + MAX_IN_PARAMS]
+            rows = self._query(f"SELECT * FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", tuple(chunk))
+            found.update((row["id"], row) for row in rows)
+        return [found[record_id] for record_id in record_ids if record_id in found]
+
+    def _insert(self, table: str, record: Dict):
+        columns = COLUMNS[table]
+        with self._writing() as conn:
+            conn.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [record[c] for c in columns]
+            )
+        self._notify(table, [record])
+
+    def _update(self, table: str, record_id: str, changes: Dict) -> Optional[Dict]:
+        columns = [c for c in changes if c in COLUMNS[table] and c not in IMMUTABLE_FIELDS]
+        with self._writing() as conn:
+            cursor = conn.execute(
+                f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+                [changes[c] for c in columns] + [record_id]
+            )
+        if cursor.rowcount == 0:
+            return None
+        record = self._query_one(f"SELECT * FROM {table} WHERE id = ?", (record_id,))
+        self._notify(table, [record])
+        return record
+
+    def _delete(self, table: str, record_id: str) -> bool:
+        with self._writing() as conn:
+            cursor = conn.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
+        if cursor.rowcount == 0:
+            return False
+        self._notify(table, [], [record_id])
+        return True
+
+    def _cascade(self, table: str, column: str, value: str):
+        # Remove rows referencing a deleted parent, found through the column's index
+        with self._writing() as conn:
+            doomed = [row[0] for row in conn.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,))]
+            conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (value,))
+        if doomed:
+            self._notify(table, [], doomed)
+
+    def import_records(self, table: str, records: List[Dict]):
+        columns = COLUMNS[table]
+        with self._writing() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [[record.get(c) for c in columns] for record in records]
+            )
+        self._notify(table, None)
+
+    def _generate_id(self) -> str:
+        return str(uuid.uuid4())
+
+    def _now(self) -> str:
+        return datetime.utcnow().isoformat() + 'Z'
+
+    def create_note(self, title: str, body: str) -> Dict:
+        note = {
+            "id": self._generate_id(),
+            "title": title,
+            "body": body,
+            "is_inspiration": False,
+            "is_analyzed": False,
+            "created_at": self._now(),
+            "updated_at": self._now()
+        }
+        self._insert("notes", note)
+        return note
+
+    def get_notes(self) -> List[Dict]:
+        return self._query("SELECT * FROM notes ORDER BY rowid")
+
+    def get_notes_page(self, after: Optional[Tuple[str, str]] = None, limit: Optional[int] = None,
+                       is_inspiration: Optional[bool] = None,
+                       is_analyzed: Optional[bool] = None) -> Tuple[List[Dict], Optional[Tuple[str, str]]]:
+        if limit is not None and limit < 1:
+            return [], None
+        clauses = []
+        params = []
+        if after is not None:
+            clauses.append("(created_at, id) > (?, ?)")
+            params.extend(after)
+        if is_inspiration is not None:
+            clauses.append("is_inspiration = ?")
+            params.append(int(is_inspiration))
+        if is_analyzed is not None:
+            clauses.append("is_analyzed = ?")
+            params.append(int(is_analyzed))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM notes {where} ORDER BY created_at, id"
+        if limit is not None:
+            # Fetch one extra row to learn whether another page follows
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        page = self._query(sql, tuple(params))
+        if limit is not None and len(page) > limit:
+            page = page[:limit]
+            return page, (page[-1]["created_at"], page[-1]["id"])
+        return page, None
+
+    def get_note(self, note_id: str) -> Optional[Dict]:
+        return self._query_one("SELECT * FROM notes WHERE id = ?", (note_id,))
+
+    def get_notes_by_ids(self, note_ids: Sequence[str]) -> List[Dict]:
+        return self._get_by_ids("notes", note_ids)
+
+    def update_note(self, note_id: str, title: Optional[str] = None, body: Optional[str] = None,
+                    is_inspiration: Optional[bool] = None, is_analyzed: Optional[bool] = None) -> Optional[Dict]:
+        changes = {
+            "title": title,
+            "body": body,
+            "is_inspiration": is_inspiration,
+            "is_analyzed": is_analyzed,
+        }
+        changes = {key: value for key, value in changes.items() if value is not None}
+        changes["updated_at"] = self._now()
+        return self._update("notes", note_id, changes)
+
+    def delete_note(self, note_id: str) -> bool:
+        """Delete a note along with its links and inspirations."""
+        with self.transaction():
+            if not self._delete("notes", note_id):
+                return False
+            self._cascade("links", "note_id", note_id)
+            self._cascade("inspirations", "note_id", note_id)
+        return True
+
+    def create_planner_item(self, title: str, body: str, date: str, time: Optional[str], view_type: str) -> Dict:
+        item = {
+            "id": self._generate_id(),
+            "title": title,
+            "body": body,
+            "date": date,
+            "time": time,
+            "view_type": view_type,
+            "status": "pending",
+            "created_at": self._now(),
+            "updated_at": self._now()
+        }
+        self._insert("planner_items", item)
+        return item
+
+    def get_planner_items(self, date_start: Optional[str] = None, date_end: Optional[str] = None,
+                         view_type: Optional[str] = None, status: Optional[str] = None) -> List[Dict]:
+        clauses = []
+        params = []
+        if date_start:
+            clauses.append("date >= ?")
+            params.append(date_start)
+        if date_end:
+            clauses.append("date <= ?")
+            params.append(date_end)
+        if view_type:
+            clauses.append("view_type = ?")
+            params.append(view_type)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "date, rowid" if date_start or date_end else "rowid"
+        return self._query(f"SELECT * FROM planner_items {where} ORDER BY {order}", tuple(params))
+
+    def get_planner_item(self, item_id: str) -> Optional[Dict]:
+        return self._query_one("SELECT * FROM planner_items WHERE id = ?", (item_id,))
+
+    def get_planner_items_by_ids(self, item_ids: Sequence[str]) -> List[Dict]:
+        return self._get_by_ids("planner_items", item_ids)
+
+    def update_planner_item(self, item_id: str, **kwargs) -> Optional[Dict]:
+        changes = {key: value for key, value in kwargs.items() if value is not None}
+        changes["updated_at"] = self._now()
+        return self._update("planner_items", item_id, changes)
+
+    def toggle_planner_item_status(self, item_id: str) -> Optional[Dict]:
+        with self._writing() as conn:
+            cursor = conn.execute(
+                "UPDATE planner_items SET status = CASE status WHEN 'pending' THEN 'completed' ELSE 'pending' END, "
+                "updated_at = ? WHERE id = ?",
+                (self._now(), item_id)
+            )
+        if cursor.rowcount == 0:
+            return None
+        item = self.get_planner_item(item_id)
+        self._notify("planner_items", [item])
+        return item
+
+    def delete_planner_item(self, item_id: str) -> bool:
+        """Delete a planner item along with its links."""
+        with self.transaction():
+            if not self._delete("planner_items", item_id):
+                return False
+            self._cascade("links", "planner_item_id", item_id)
+        return True
+
+    def create_inspiration(self, note_id: str, category: str, ai_confidence: float) -> Dict:
+        inspiration = {
+            "id": self._generate_id(),
+            "note_id": note_id,
+            "category": category,
+            "ai_confidence": ai_confidence,
+            "created_at": self._now()
+        }
+        self._insert("inspirations", inspiration)
+        return inspiration
+
+    def get_inspirations(self) -> List[Dict]:
+        return self._query("SELECT * FROM inspirations ORDER BY rowid")
+
+    def get_inspirations_by_note(self, note_id: str) -> List[Dict]:
+        return self._query("SELECT * FROM inspirations WHERE note_id = ? ORDER BY rowid", (note_id,))
+
+    def get_inspirations_by_ids(self, inspiration_ids: Sequence[str]) -> List[Dict]:
+        return self._get_by_ids("inspirations", inspiration_ids)
+
+    def get_inspirations_grouped(self) -> Dict[str, List[Dict]]:
+        rows = self._query(
+            "SELECT n.*, i.id AS inspiration_id, i.ai_confidence, i.category AS inspiration_category "
+            "FROM inspirations i JOIN notes n ON n.id = i.note_id ORDER BY i.rowid"
+        )
+        result = {}
+        for row in rows:
+            result.setdefault(row.pop("inspiration_category"), []).append(row)
+        return result
+
+    def delete_inspiration(self, inspiration_id: str) -> bool:
+        return self._delete("inspirations", inspiration_id)
+
+    def create_category(self, name: str, status: str = "active", discovered_by: str = "user") -> Dict:
+        category = {
+            "id": self._generate_id(),
+            "name": name,
+            "status": status,
+            "discovered_by": discovered_by,
+            "created_at": self._now()
+        }
+        self._insert("inspiration_categories", category)
+        return category
+
+    def get_categories(self, status: Optional[str] = None) -> List[Dict]:
+        if status:
+            return self._query("SELECT * FROM inspiration_categories WHERE status = ? ORDER BY rowid", (status,))
+        return self._query("SELECT * FROM inspiration_categories ORDER BY rowid")
+
+    def update_category_status(self, category_id: str, status: str) -> Optional[Dict]:
+        return self._update("inspiration_categories", category_id, {"status": status})
+
+    def delete_category(self, category_id: str) -> bool:
+        return self._delete("inspiration_categories", category_id)
+
+    def create_link(self, note_id: str, planner_item_id: str) -> Dict:
+        link = {
+            "id": self._generate_id(),
+            "note_id": note_id,
+            "planner_item_id": planner_item_id,
+            "created_at": self._now()
+        }
+        columns = COLUMNS["links"]
+        with self._writing() as conn:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO links ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [link[c] for c in columns]
+            )
+        if cursor.rowcount:
+            self._notify("links", [link])
+            return link
+        return self._query_one(
+            "SELECT * FROM links WHERE note_id = ? AND planner_item_id = ?", (note_id, planner_item_id)
+        )
+
+    def get_links(self) -> List[Dict]:
+        return self._query("SELECT * FROM links ORDER BY rowid")
+
+    def get_links_by_note(self, note_id: str) -> List[Dict]:
+        return self._query("SELECT * FROM links WHERE note_id = ? ORDER BY rowid", (note_id,))
+
+    def get_links_by_planner_item(self, planner_item_id: str) -> List[Dict]:
+        return self._query("SELECT * FROM links WHERE planner_item_id = ? ORDER BY rowid", (planner_item_id,))
+
+    def delete_link(self, link_id: str) -> bool:
+        return self._delete("links", link_id)
+
+    def vacuum(self) -> Dict[str, int]:
+        """Delete links and inspirations left behind by notes or planner items deleted
+        before deletes cascaded, then reclaim free pages. Returns the number of rows removed per table."""
+        orphan_queries = {
+            "links": "SELECT id FROM links WHERE note_id NOT IN (SELECT id FROM notes) "
+                     "OR planner_item_id NOT IN (SELECT id FROM planner_items)",
+            "inspirations": "SELECT id FROM inspirations WHERE note_id NOT IN (SELECT id FROM notes)"
+        }
+        removed = {}
+        with self.transaction():
+            conn = self._connect()
+            for table, query in orphan_queries.items():
+                doomed = [row[0] for row in conn.execute(query)]
+                conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(record_id,) for record_id in doomed])
+                if doomed:
+                    self._notify(table, [], doomed)
+                removed[table] = len(doomed)
+        self._connect().execute("VACUUM")
+        return removed
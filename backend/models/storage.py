@@ -1,14 +1,348 @@
-import json
+import functools
+import heapq
 import os
+import re
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Type
 import uuid
+from bisect import bisect_left, bisect_right, insort
+from operator import attrgetter, itemgetter
+
+from models import serialization
+from models.locking import ReadWriteLock
+from models.metrics import REGISTRY
+from models.shared import Lazy
+from models.records import Category, Inspiration, Link, Note, PlannerItem, Record, as_rows
+
+READ_SECONDS = REGISTRY.histogram("storage_read_seconds", "Time to read and decode collection files", ["collection"])
+READ_BYTES = REGISTRY.counter("storage_read_bytes_total", "Bytes read from collection files", ["collection"])
+WRITE_SECONDS = REGISTRY.histogram("storage_write_seconds", "Time to encode and write collection files", ["collection"])
+WRITE_BYTES = REGISTRY.counter("storage_write_bytes_total", "Bytes written to collection files", ["collection"])
+
+# Set when a record is created; updates leave them alone
+IMMUTABLE_FIELDS = ("id", "created_at")
+
+# Called as listener(collection_name, put, deleted) after changes are persisted; put is None
+# when the collection was (re)loaded from disk and listeners should resynchronize
+ChangeListener = Callable[[str, Optional[Sequence[Mapping]], Sequence[str]], None]
+
+def _reads(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _writes(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _check_id(record: Record, changes: Dict[str, Any]):
+    # Records are keyed by id, so a changed id would leave the old entry behind
+    if "id" in changes and changes["id"] != record.id:
+        raise ValueError(f"Cannot change the id of {type(record).__name__} {record.id}")
+
+class _Collection:
+    """In-memory copy of a collection file with hash indexes over its records.
+    
+    Records are held as tuples (see models.records) keyed by id, and handed out wrapped in
+    record_type. indexed_fields get a value -> records hash index; sorted_fields get a
+    sorted list of (value, id) pairs for range scans.
+    """
+    
+    def __init__(self, path: Path, record_type: Type[Record], indexed_fields: Tuple[str, ...] = (),
+                 sorted_fields: Tuple[str, ...] = ()):
+        self.path = path
+        self.record_type = record_type
+        self.indexed_fields = indexed_fields
+        self.sorted_fields = sorted_fields
+        self.signature: Optional[Tuple[int, int]] = None
+        self.records: Dict[str, tuple] = {}
+        self.indexes: Dict[str, Dict[Any, Dict[str, tuple]]] = {field: {} for field in indexed_fields}
+        self.sorted_indexes: Dict[str, List[Tuple[Any, str]]] = {field: [] for field in sorted_fields}
+        self._positions = record_type.positions
+    
+    def load(self, records: List[Dict]):
+        # Build aside and swap in, so concurrent readers never see a half-loaded collection
+        loaded = _Collection(self.path, self.record_type, self.indexed_fields)
+        pack = self.record_type.pack_dict
+        for data in records:
+            loaded._add(pack(data))
+        sorted_indexes = {}
+        for field in self.sorted_fields:
+            position = self._positions[field]
+            sorted_indexes[field] = sorted((packed[position], packed[0]) for packed in loaded.records.values())
+        self.records, self.indexes, self.sorted_indexes = loaded.records, loaded.indexes, sorted_indexes
+    
+    def _index(self, field: str, packed: tuple):
+        self.indexes[field].setdefault(packed[self._positions[field]], {})[packed[0]] = packed
+    
+    def _unindex(self, field: str, packed: tuple):
+        value = packed[self._positions[field]]
+        bucket = self.indexes[field].get(value)
+        if bucket is not None:
+            bucket.pop(packed[0], None)
+            if not bucket:
+                del self.indexes[field][value]
+    
+    def _sort_index(self, field: str, packed: tuple):
+        insort(self.sorted_indexes[field], (packed[self._positions[field]], packed[0]))
+    
+    def _sort_unindex(self, field: str, packed: tuple):
+        keys = self.sorted_indexes[field]
+        position = bisect_left(keys, (packed[self._positions[field]], packed[0]))
+        if position < len(keys) and keys[position][1] == packed[0]:
+            del keys[position]
+    
+    def _add(self, packed: tuple):
+        self.records[packed[0]] = packed
+        for field in self.indexed_fields:
+            self._index(field, packed)
+        for field in self.sorted_fields:
+            self._sort_index(field, packed)
+    
+    def _remove(self, record_id: str) -> Optional[tuple]:
+        packed = self.records.pop(record_id, None)
+        if packed is not None:
+            for field in self.indexed_fields:
+                self._unindex(field, packed)
+            for field in self.sorted_fields:
+                self._sort_unindex(field, packed)
+        return packed
+    
+    def _wrap(self, packed: Optional[tuple]) -> Optional[Record]:
+        return None if packed is None else self.record_type(packed)
+    
+    def add(self, record: Record):
+        self._add(record.packed)
+    
+    def put(self, record: Record):
+        """Add record, replacing any record with the same id."""
+        self._remove(record.id)
+        self._add(record.packed)
+    
+    def update(self, record: Record, changes: Dict[str, Any]) -> Record:
+        """Replace record with a copy that has changes applied, and return it."""
+        _check_id(record, changes)
+        updated = record.replace(changes)
+        old, new = record.packed, updated.packed
+        self.records[new[0]] = new
+        for field in self.indexed_fields:
+            # Unchanged fields keep their bucket; _index just swaps in the new tuple
+            if field in changes:
+                self._unindex(field, old)
+            self._index(field, new)
+        for field in self.sorted_fields:
+            if field in changes:
+                self._sort_unindex(field, old)
+                self._sort_index(field, new)
+        return updated
+    
+    def remove(self, record_id: str) -> Optional[Record]:
+        return self._wrap(self._remove(record_id))
+    
+    def get(self, record_id: str) -> Optional[Record]:
+        return self._wrap(self.records.get(record_id))
+    
+    def find(self, field: str, value: Any) -> List[Record]:
+        return list(map(self.record_type, self.indexes[field].get(value, {}).values()))
+    
+    def count(self, field: str, value: Any) -> int:
+        return len(self.indexes[field].get(value, {}))
+    
+    def _range_bounds(self, field: str, start: Any, end: Any) -> Tuple[int, int]:
+        keys = self.sorted_indexes[field]
+        lo = bisect_left(keys, start, key=itemgetter(0)) if start is not None else 0
+        hi = bisect_right(keys, end, key=itemgetter(0)) if end is not None else len(keys)
+        return lo, max(lo, hi)
+    
+    def count_range(self, field: str, start: Any = None, end: Any = None) -> int:
+        lo, hi = self._range_bounds(field, start, end)
+        return hi - lo
+    
+    def scan(self, field: str, after: Optional[Tuple[Any, str]] = None) -> Iterator[Record]:
+        """Records in (field, id) order, starting just past the after key."""
+        keys = self.sorted_indexes[field]
+        position = bisect_right(keys, tuple(after)) if after is not None else 0
+        records, record_type = self.records, self.record_type
+        for index in range(position, len(keys)):
+            yield record_type(records[keys[index][1]])
+    
+    def range(self, field: str, start: Any = None, end: Any = None) -> List[Record]:
+        """Records with start <= record[field] <= end, in field order."""
+        lo, hi = self._range_bounds(field, start, end)
+        return [self.record_type(self.records[record_id]) for _, record_id in self.sorted_indexes[field][lo:hi]]
+    
+    def all(self) -> List[Record]:
+        return list(map(self.record_type, self.records.values()))
+
+_MONTH = re.compile(r"\d{4}-\d{2}")
+UNDATED_SHARD = "undated"
+
+def _month(value: Any) -> str:
+    """Shard key of a date or timestamp string: its YYYY-MM prefix."""
+    if isinstance(value, str) and _MONTH.match(value):
+        return value[:7]
+    return UNDATED_SHARD
+
+class _ShardedCollection:
+    """A collection split by the month of shard_field into one _Collection per shard file
+    under path (notes/2025-01.json), each with the ids it holds listed beside it
+    (notes/2025-01.ids.json), plus a manifest of shard sizes.
+    
+    Shards are loaded through open_shard on first use, so lookups by id and ranges over
+    shard_field only read the shards they need. Mutations mark the shards they touch dirty
+    for LocalStorage to write back; when records are added, removed or move to another
+    month, that shard's id list and the manifest are rewritten too, never a list of every id.
+    """
+    
+    def __init__(self, path: Path, record_type: Type[Record], shard_field: str,
+                 open_shard: Callable[["_ShardedCollection", _Collection], None],
+                 indexed_fields: Tuple[str, ...] = (), sorted_fields: Tuple[str, ...] = ()):
+        self.path = path
+        self.manifest_path = path / "manifest.json"
+        self.record_type = record_type
+        self.shard_field = shard_field
+        self.indexed_fields = indexed_fields
+        self.sorted_fields = sorted_fields
+        self.signature: Optional[Tuple[int, int]] = None
+        # shard key -> ids of its records, and the signature of the ids file they were read from
+        self.ids: Dict[str, set] = {}
+        self.id_signatures: Dict[str, Optional[Tuple[int, int]]] = {}
+        self.shards: Dict[str, _Collection] = {}
+        self.dirty_shards: set = set()
+        # Shards whose ids changed; their ids files and the manifest are written with them
+        self.dirty_ids: set = set()
+        # Bumped by every LocalStorage._collection call; shard key -> generation it was last checked in
+        self.generation = 0
+        self.checked: Dict[str, int] = {}
+        self._open_shard = open_shard
+        self._position = record_type.positions[shard_field]
+    
+    def reset(self):
+        # Loaded shards may hold changes that were never written, so they are dropped too
+        self.ids, self.id_signatures, self.shards = {}, {}, {}
+        self.dirty_shards, self.dirty_ids, self.checked = set(), set(), {}
+    
+    def ids_path(self, key: str) -> Path:
+        return self.path / f"{key}.ids.json"
+    
+    def manifest_data(self) -> Dict[str, Any]:
+        return {"shard_field": self.shard_field, "shards": {key: len(self.ids[key]) for key in sorted(self.ids)}}
+    
+    def _shard(self, key: str) -> _Collection:
+        shard = self.shards.get(key)
+        if shard is None:
+            shard = self.shards.setdefault(key, _Collection(
+                self.path / f"{key}.json", self.record_type, self.indexed_fields, self.sorted_fields
+            ))
+        # Checked against its file once per storage operation, like unsharded collections
+        if self.checked.get(key) != self.generation:
+            self._open_shard(self, shard)
+            self.checked[key] = self.generation
+        return shard
+    
+    def _keys(self, start: Any = None, end: Any = None) -> List[str]:
+        # Shards that can hold shard_field values in [start, end]; unbounded if a bound has no month
+        lo = _month(start) if start is not None else UNDATED_SHARD
+        hi = _month(end) if end is not None else UNDATED_SHARD
+        return sorted(
+            key for key in self.ids
+            if key == UNDATED_SHARD
+            or ((lo == UNDATED_SHARD or key >= lo) and (hi == UNDATED_SHARD or key <= hi))
+        )
+    
+    def _key_of(self, record_id: str) -> Optional[str]:
+        # One set lookup per month
+        for key, ids in self.ids.items():
+            if record_id in ids:
+                return key
+        return None
+    
+    def add(self, record: Record):
+        key = _month(record.packed[self._position])
+        self._shard(key).add(record)
+        self.ids.setdefault(key, set()).add(record.id)
+        self.dirty_shards.add(key)
+        self.dirty_ids.add(key)
+    
+    def put(self, record: Record):
+        self.remove(record.id)
+        self.add(record)
+    
+    def update(self, record: Record, changes: Dict[str, Any]) -> Record:
+        _check_id(record, changes)
+        key = self._key_of(record.id)
+        if self.shard_field in changes and _month(changes[self.shard_field]) != key:
+            self.remove(record.id)
+            updated = record.replace(changes)
+            self.add(updated)
+            return updated
+        self.dirty_shards.add(key)
+        return self._shard(key).update(record, changes)
+    
+    def remove(self, record_id: str) -> Optional[Record]:
+        key = self._key_of(record_id)
+        if key is None:
+            return None
+        record = self._shard(key).remove(record_id)
+        ids = self.ids[key]
+        ids.discard(record_id)
+        if not ids:
+            del self.ids[key]
+        self.dirty_shards.add(key)
+        self.dirty_ids.add(key)
+        return record
+    
+    def get(self, record_id: str) -> Optional[Record]:
+        key = self._key_of(record_id)
+        return self._shard(key).get(record_id) if key is not None else None
+    
+    def find(self, field: str, value: Any) -> List[Record]:
+        return [record for key in self._keys() for record in self._shard(key).find(field, value)]
+    
+    def count(self, field: str, value: Any) -> int:
+        return sum(self._shard(key).count(field, value) for key in self._keys())
+    
+    def count_range(self, field: str, start: Any = None, end: Any = None) -> int:
+        keys = self._keys(start, end) if field == self.shard_field else self._keys()
+        return sum(self._shard(key).count_range(field, start, end) for key in keys)
+    
+    def _order(self, field: str) -> Callable[[Record], Tuple[Any, str]]:
+        position = self.record_type.positions[field]
+        return lambda record: (record.packed[position], record.packed[0])
+    
+    def scan(self, field: str, after: Optional[Tuple[Any, str]] = None) -> Iterator[Record]:
+        if field != self.shard_field:
+            yield from heapq.merge(*(self._shard(key).scan(field, after) for key in self._keys()),
+                                   key=self._order(field))
+            return
+        # Months sort like the values in them, so shards are scanned one after another
+        for key in self._keys(after[0] if after is not None else None):
+            yield from self._shard(key).scan(field, after)
+    
+    def range(self, field: str, start: Any = None, end: Any = None) -> List[Record]:
+        if field != self.shard_field:
+            records = [record for key in self._keys() for record in self._shard(key).range(field, start, end)]
+            return sorted(records, key=self._order(field))
+        return [record for key in self._keys(start, end) for record in self._shard(key).range(field, start, end)]
+    
+    def all(self) -> List[Record]:
+        return [record for key in self._keys() for record in self._shard(key).all()]
 
 class LocalStorage:
-    def __init__(self, base_path: str = "generated"):
+    def __init__(self, base_path: str = "generated", storage_format: str = "json", shard_by_month: bool = False):
         self.base_path = Path(base_path)
         self.base_path.mkdir(exist_ok=True)
+        # Files are written with this codec; reads detect the format, so existing files keep loading
+        self.codec = serialization.get_codec(storage_format)
+        self.shard_by_month = shard_by_month
         
         self.notes_file = self.base_path / "notes.json"
         self.planner_items_file = self.base_path / "planner_items.json"
@@ -16,21 +350,248 @@ class LocalStorage:
         self.categories_file = self.base_path / "inspiration_categories.json"
         self.links_file = self.base_path / "links.json"
         
+        self._collections: Dict[Path, Any] = {
+            self.notes_file: self._partitioned(self.notes_file, Note, "created_at", sorted_fields=("created_at",)),
+            self.planner_items_file: self._partitioned(self.planner_items_file, PlannerItem, "date",
+                                                       indexed_fields=("view_type", "status"), sorted_fields=("date",)),
+            self.inspirations_file: _Collection(self.inspirations_file, Inspiration,
+                                                indexed_fields=("note_id", "category")),
+            self.categories_file: _Collection(self.categories_file, Category),
+            self.links_file: _Collection(self.links_file, Link, indexed_fields=("note_id", "planner_item_id")),
+        }
+        
+        self._lock = ReadWriteLock(self.base_path / ".storage.lock")
+        self._reload_lock = threading.Lock()
+        self._transaction: Optional[Dict[Path, Tuple[_Collection, Dict[str, Record], set]]] = None
+        self._listeners: List[ChangeListener] = []
+        
         self._init_files()
     
+    def _partitioned(self, file_path: Path, record_type: Type[Record], shard_field: str, **fields):
+        if not self.shard_by_month:
+            return _Collection(file_path, record_type, **fields)
+        # notes.json becomes notes/2025-01.json (+ 2025-01.ids.json), ... and notes/manifest.json
+        return _ShardedCollection(file_path.with_suffix(""), record_type, shard_field, self._open_shard, **fields)
+    
+    @_writes
     def _init_files(self):
-        for file in [self.notes_file, self.planner_items_file, self.inspirations_file, 
-                     self.categories_file, self.links_file]:
-            if not file.exists():
+        for file, collection in self._collections.items():
+            if isinstance(collection, _ShardedCollection):
+                self._init_shards(file, collection)
+            elif not file.exists():
                 self._write_json(file, [])
     
-    def _read_json(self, file_path: Path) -> List[Dict]:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+    def _init_shards(self, file_path: Path, collection: _ShardedCollection):
+        collection.path.mkdir(exist_ok=True)
+        if collection.manifest_path.exists():
+            return
+        # Split an existing unsharded file, keeping it aside as e.g. notes.json.bak
+        collection.reset()
+        if file_path.exists():
+            for data in self._read_json(file_path):
+                collection.add(collection.record_type.from_dict(data))
+        self._persist(collection)
+        if file_path.exists():
+            os.replace(file_path, file_path.with_suffix(".json.bak"))
+    
+    def _metrics_label(self, file_path: Path) -> str:
+        # Shard files and manifests are reported under their collection
+        if file_path.parent != self.base_path:
+            return file_path.parent.name
+        return file_path.name.split(".")[0]
+    
+    def _read_json(self, file_path: Path) -> Any:
+        collection = self._metrics_label(file_path)
+        with READ_SECONDS.time(collection=collection):
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+            data = serialization.decode(raw)
+        READ_BYTES.inc(len(raw), collection=collection)
+        return data
     
-    def _write_json(self, file_path: Path, data: List[Dict]):
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+    def _write_json(self, file_path: Path, data: Sequence[Record]):
+        self._write_file(file_path, as_rows(data))
+    
+    def _write_file(self, file_path: Path, data: Any):
+        collection = self._metrics_label(file_path)
+        with WRITE_SECONDS.time(collection=collection):
+            raw = self.codec.encode(data)
+            with open(file_path, 'wb') as f:
+                f.write(raw)
+        WRITE_BYTES.inc(len(raw), collection=collection)
+    
+    def _file_signature(self, file_path: Path) -> Tuple[int, int]:
+        stat = file_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _collection(self, file_path: Path) -> _Collection:
+        # Serve from memory unless the file (for sharded collections, the manifest) was
+        # changed behind our back
+        collection = self._collections[file_path]
+        sharded = isinstance(collection, _ShardedCollection)
+        if sharded:
+            file_path = collection.manifest_path
+        with self._reload_lock:
+            if sharded:
+                collection.generation += 1
+            signature = self._file_signature(file_path)
+            reloaded = collection.signature != signature
+            if reloaded:
+                if sharded:
+                    self._load_manifest(collection)
+                else:
+                    collection.load(self._read_json(file_path))
+                collection.signature = signature
+        if reloaded:
+            self._notify(collection, None)
+        return collection
+    
+    def _load_manifest(self, collection: _ShardedCollection):
+        # After a failed write (no signature) everything is read again; after another
+        # process wrote, only the id lists whose files changed
+        if collection.signature is None:
+            collection.reset()
+        sizes = self._read_json(collection.manifest_path).get("shards", {})
+        # Only the read lock is held, so other readers may be going through ids: build new
+        # dicts and swap them in rather than changing the ones they are iterating
+        ids, id_signatures = {}, {}
+        for key in sizes:
+            path = collection.ids_path(key)
+            try:
+                signature = self._file_signature(path)
+            except FileNotFoundError:
+                signature = None
+            if key in collection.ids and collection.id_signatures.get(key) == signature:
+                ids[key] = collection.ids[key]
+            else:
+                ids[key] = set(self._read_json(path)) if signature is not None else set()
+            id_signatures[key] = signature
+        collection.ids, collection.id_signatures = ids, id_signatures
+    
+    def _open_shard(self, collection: _ShardedCollection, shard: _Collection):
+        # Load a shard on first use, or again if its file changed; shards not written yet
+        # (or emptied and removed) have no file
+        with self._reload_lock:
+            try:
+                signature = self._file_signature(shard.path)
+            except FileNotFoundError:
+                signature = None
+            if shard.signature == signature:
+                return
+            changed = shard.signature is not None
+            shard.load(self._read_json(shard.path) if signature is not None else [])
+            shard.signature = signature
+        if changed:
+            self._notify(collection, None)
+    
+    def subscribe(self, listener: ChangeListener):
+        """Register a callback for changes to any collection (see ChangeListener)."""
+        self._listeners.append(listener)
+    
+    @_reads
+    def refresh(self, collections: Sequence[str]):
+        """Check the named collections against their files, so changes another process made
+        reach listeners (as reloads) without waiting for the next read of those collections."""
+        for file_path, collection in self._collections.items():
+            if collection.path.stem not in collections:
+                continue
+            self._collection(file_path)
+            if isinstance(collection, _ShardedCollection):
+                # Edits within a month leave the manifest alone; check the shards already loaded
+                for key in list(collection.shards):
+                    collection._shard(key)
+    
+    def _notify(self, collection: _Collection, put: Optional[Sequence[Record]], deleted: Sequence[str] = ()):
+        for listener in self._listeners:
+            listener(collection.path.stem, put, deleted)
+    
+    def _save(self, collection: _Collection, put: Sequence[Record] = (), deleted: Sequence[str] = ()):
+        if self._transaction is None:
+            self._persist(collection, put, deleted)
+            self._notify(collection, put, deleted)
+            return
+        
+        # Inside a transaction, collect the changes so each collection is written once on commit
+        _, pending_put, pending_deleted = self._transaction.setdefault(collection.path, (collection, {}, set()))
+        for record in put:
+            pending_put[record["id"]] = record
+            pending_deleted.discard(record["id"])
+        for record_id in deleted:
+            pending_put.pop(record_id, None)
+            pending_deleted.add(record_id)
+    
+    def _persist(self, collection: _Collection, put: Sequence[Record] = (), deleted: Sequence[str] = ()):
+        # put/deleted describe the mutation; the JSON backend rewrites the whole file regardless
+        if isinstance(collection, _ShardedCollection):
+            self._persist_shards(collection)
+            return
+        try:
+            self._write_json(collection.path, collection.all())
+        except Exception:
+            # Memory may now be ahead of disk; force a reload on next access
+            collection.signature = None
+            raise
+        collection.signature = self._file_signature(collection.path)
+    
+    def _persist_shards(self, collection: _ShardedCollection):
+        # Only the shards touched since the last write, with their id lists and the manifest
+        # if ids came or went
+        try:
+            for key in sorted(collection.dirty_shards):
+                shard = collection.shards[key]
+                ids_path = collection.ids_path(key)
+                if shard.records:
+                    self._write_json(shard.path, shard.all())
+                    shard.signature = self._file_signature(shard.path)
+                    if key in collection.dirty_ids:
+                        self._write_file(ids_path, sorted(collection.ids[key]))
+                        collection.id_signatures[key] = self._file_signature(ids_path)
+                else:
+                    shard.path.unlink(missing_ok=True)
+                    ids_path.unlink(missing_ok=True)
+                    shard.signature = None
+                    collection.id_signatures.pop(key, None)
+            if collection.dirty_ids or not collection.manifest_path.exists():
+                self._write_file(collection.manifest_path, collection.manifest_data())
+        except Exception:
+            collection.signature = None
+            raise
+        collection.dirty_shards.clear()
+        collection.dirty_ids.clear()
+        collection.signature = self._file_signature(collection.manifest_path)
+    
+    @contextmanager
+    def transaction(self):
+        """Apply every mutation in the block atomically, with one write per touched collection.
+        
+        If the block raises, nothing is written and collections are reloaded from disk.
+        """
+        with self._lock.write():
+            if self._transaction is not None:
+                yield self
+                return
+            
+            self._transaction = {}
+            try:
+                yield self
+            except BaseException:
+                self._transaction = None
+                for collection in self._collections.values():
+                    collection.signature = None
+                raise
+            
+            pending, self._transaction = self._transaction, None
+            for collection, put, deleted in pending.values():
+                self._persist(collection, list(put.values()), list(deleted))
+            for collection, put, deleted in pending.values():
+                self._notify(collection, list(put.values()), list(deleted))
+    
+    def _cascade(self, file_path: Path, field: str, value: str):
+        # Remove records referencing a deleted parent, found through the field's index
+        collection = self._collection(file_path)
+        doomed = [collection.remove(record.id) for record in collection.find(field, value)]
+        if doomed:
+            self._save(collection, deleted=[record["id"] for record in doomed])
     
     def _generate_id(self) -> str:
         return str(uuid.uuid4())
@@ -38,213 +599,387 @@ class LocalStorage:
     def _now(self) -> str:
         return datetime.utcnow().isoformat() + 'Z'
     
-    def create_note(self, title: str, body: str) -> Dict:
-        notes = self._read_json(self.notes_file)
-        note = {
-            "id": self._generate_id(),
-            "title": title,
-            "body": body,
-            "is_inspiration": False,
-            "is_analyzed": False,
-            "created_at": self._now(),
-            "updated_at": self._now()
-        }
-        notes.append(note)
-        self._write_json(self.notes_file, notes)
+    @_writes
+    def create_note(self, title: str, body: str) -> Note:
+        notes = self._collection(self.notes_file)
+        note = Note.create(
+            id=self._generate_id(),
+            title=title,
+            body=body,
+            is_inspiration=False,
+            is_analyzed=False,
+            created_at=self._now(),
+            updated_at=self._now()
+        )
+        notes.add(note)
+        self._save(notes, put=[note])
         return note
     
-    def get_notes(self) -> List[Dict]:
-        return self._read_json(self.notes_file)
+    @_reads
+    def get_notes(self) -> List[Note]:
+        return self._collection(self.notes_file).all()
+    
+    @_reads
+    def get_notes_page(self, after: Optional[Tuple[str, str]] = None, limit: Optional[int] = None,
+                       is_inspiration: Optional[bool] = None,
+                       is_analyzed: Optional[bool] = None) -> Tuple[List[Note], Optional[Tuple[str, str]]]:
+        """Notes ordered by (created_at, id) after the given cursor, plus the cursor of the next page.
+        A limit below 1 gives an empty page."""
+        if limit is not None and limit < 1:
+            return [], None
+        page = []
+        for note in self._collection(self.notes_file).scan("created_at", after):
+            if is_inspiration is not None and note.is_inspiration != is_inspiration:
+                continue
+            if is_analyzed is not None and note.is_analyzed != is_analyzed:
+                continue
+            if limit is not None and len(page) == limit:
+                last = page[-1]
+                return page, (last["created_at"], last["id"])
+            page.append(note)
+        return page, None
+    
+    @_reads
+    def get_note(self, note_id: str) -> Optional[Note]:
+        return self._collection(self.notes_file).get(note_id)
     
-    def get_note(self, note_id: str) -> Optional[Dict]:
-        notes = self._read_json(self.notes_file)
-        return next((n for n in notes if n["id"] == note_id), None)
+    @_reads
+    def get_notes_by_ids(self, note_ids: Sequence[str]) -> List[Note]:
+        notes = self._collection(self.notes_file)
+        return [note for note in map(notes.get, note_ids) if note is not None]
     
+    @_writes
     def update_note(self, note_id: str, title: Optional[str] = None, body: Optional[str] = None, 
-                    is_inspiration: Optional[bool] = None, is_analyzed: Optional[bool] = None) -> Optional[Dict]:
-        notes = self._read_json(self.notes_file)
-        for note in notes:
-            if note["id"] == note_id:
-                if title is not None:
-                    note["title"] = title
-                if body is not None:
-                    note["body"] = body
-                if is_inspiration is not None:
-                    note["is_inspiration"] = is_inspiration
-                if is_analyzed is not None:
-                    note["is_analyzed"] = is_analyzed
-                note["updated_at"] = self._now()
-                self._write_json(self.notes_file, notes)
-                return note
-        return None
+                    is_inspiration: Optional[bool] = None, is_analyzed: Optional[bool] = None) -> Optional[Note]:
+        notes = self._collection(self.notes_file)
+        note = notes.get(note_id)
+        if note is None:
+            return None
+        
+        changes = {}
+        if title is not None:
+            changes["title"] = title
+        if body is not None:
+            changes["body"] = body
+        if is_inspiration is not None:
+            changes["is_inspiration"] = is_inspiration
+        if is_analyzed is not None:
+            changes["is_analyzed"] = is_analyzed
+        changes["updated_at"] = self._now()
+        
+        note = notes.update(note, changes)
+        self._save(notes, put=[note])
+        return note
     
+    @_writes
     def delete_note(self, note_id: str) -> bool:
-        notes = self._read_json(self.notes_file)
-        filtered = [n for n in notes if n["id"] != note_id]
-        if len(filtered) < len(notes):
-            self._write_json(self.notes_file, filtered)
-            return True
-        return False
-    
-    def create_planner_item(self, title: str, body: str, date: str, time: Optional[str], view_type: str) -> Dict:
-        items = self._read_json(self.planner_items_file)
-        item = {
-            "id": self._generate_id(),
-            "title": title,
-            "body": body,
-            "date": date,
-            "time": time,
-            "view_type": view_type,
-            "status": "pending",
-            "created_at": self._now(),
-            "updated_at": self._now()
-        }
-        items.append(item)
-        self._write_json(self.planner_items_file, items)
+        """Delete a note along with its links and inspirations."""
+        with self.transaction():
+            notes = self._collection(self.notes_file)
+            if notes.remove(note_id) is None:
+                return False
+            self._save(notes, deleted=[note_id])
+            self._cascade(self.links_file, "note_id", note_id)
+            self._cascade(self.inspirations_file, "note_id", note_id)
+        return True
+    
+    @_writes
+    def create_planner_item(self, title: str, body: str, date: str, time: Optional[str], view_type: str) -> PlannerItem:
+        items = self._collection(self.planner_items_file)
+        item = PlannerItem.create(
+            id=self._generate_id(),
+            title=title,
+            body=body,
+            date=PlannerItem.pack("date", date),
+            time=PlannerItem.pack("time", time),
+            view_type=PlannerItem.pack("view_type", view_type),
+            status="pending",
+            created_at=self._now(),
+            updated_at=self._now()
+        )
+        items.add(item)
+        self._save(items, put=[item])
         return item
     
+    @_reads
     def get_planner_items(self, date_start: Optional[str] = None, date_end: Optional[str] = None, 
-                         view_type: Optional[str] = None, status: Optional[str] = None) -> List[Dict]:
-        items = self._read_json(self.planner_items_file)
-        
-        if date_start:
-            items = [i for i in items if i["date"] >= date_start]
-        if date_end:
-            items = [i for i in items if i["date"] <= date_end]
-        if view_type:
-            items = [i for i in items if i["view_type"] == view_type]
-        if status:
-            items = [i for i in items if i["status"] == status]
-        
-        return items
-    
-    def get_planner_item(self, item_id: str) -> Optional[Dict]:
-        items = self._read_json(self.planner_items_file)
-        return next((i for i in items if i["id"] == item_id), None)
-    
-    def update_planner_item(self, item_id: str, **kwargs) -> Optional[Dict]:
-        items = self._read_json(self.planner_items_file)
-        for item in items:
-            if item["id"] == item_id:
-                for key, value in kwargs.items():
-                    if value is not None and key in item:
-                        item[key] = value
-                item["updated_at"] = self._now()
-                self._write_json(self.planner_items_file, items)
-                return item
-        return None
+                         view_type: Optional[str] = None, status: Optional[str] = None) -> List[PlannerItem]:
+        items = self._collection(self.planner_items_file)
+        date_start = date_start or None
+        date_end = date_end or None
+        
+        # Scan whichever index narrows the result the most, then check the remaining filters
+        candidates = []
+        if (date_start or date_end) and isinstance(items, _ShardedCollection):
+            # Counting another index would open every shard; the range opens only overlapping ones
+            candidates.append((0, lambda: items.range("date", date_start, date_end)))
+        else:
+            if date_start or date_end:
+                candidates.append((items.count_range("date", date_start, date_end),
+                                   lambda: items.range("date", date_start, date_end)))
+            if view_type:
+                candidates.append((items.count("view_type", view_type), lambda: items.find("view_type", view_type)))
+            if status:
+                candidates.append((items.count("status", status), lambda: items.find("status", status)))
+        if not candidates:
+            return items.all()
+        
+        _, scan = min(candidates, key=itemgetter(0))
+        result = [
+            i for i in scan()
+            if (not date_start or i.date >= date_start)
+            and (not date_end or i.date <= date_end)
+            and (not view_type or i.view_type == view_type)
+            and (not status or i.status == status)
+        ]
+        if date_start or date_end:
+            result.sort(key=attrgetter("date"))
+        return result
     
-    def toggle_planner_item_status(self, item_id: str) -> Optional[Dict]:
-        items = self._read_json(self.planner_items_file)
-        for item in items:
-            if item["id"] == item_id:
-                item["status"] = "completed" if item["status"] == "pending" else "pending"
-                item["updated_at"] = self._now()
-                self._write_json(self.planner_items_file, items)
-                return item
-        return None
+    @_reads
+    def get_planner_item(self, item_id: str) -> Optional[PlannerItem]:
+        return self._collection(self.planner_items_file).get(item_id)
+    
+    @_reads
+    def get_planner_items_by_ids(self, item_ids: Sequence[str]) -> List[PlannerItem]:
+        items = self._collection(self.planner_items_file)
+        return [item for item in map(items.get, item_ids) if item is not None]
+    
+    @_writes
+    def update_planner_item(self, item_id: str, **kwargs) -> Optional[PlannerItem]:
+        items = self._collection(self.planner_items_file)
+        item = items.get(item_id)
+        if item is None:
+            return None
+        
+        changes = {key: PlannerItem.pack(key, value) for key, value in kwargs.items()
+                   if value is not None and key in item and key not in IMMUTABLE_FIELDS}
+        changes["updated_at"] = self._now()
+        
+        item = items.update(item, changes)
+        self._save(items, put=[item])
+        return item
     
+    @_writes
+    def toggle_planner_item_status(self, item_id: str) -> Optional[PlannerItem]:
+        items = self._collection(self.planner_items_file)
+        item = items.get(item_id)
+        if item is None:
+            return None
+        
+        item = items.update(item, {
+            "status": "completed" if item.status == "pending" else "pending",
+            "updated_at": self._now()
+        })
+        self._save(items, put=[item])
+        return item
+    
+    @_writes
     def delete_planner_item(self, item_id: str) -> bool:
-        items = self._read_json(self.planner_items_file)
-        filtered = [i for i in items if i["id"] != item_id]
-        if len(filtered) < len(items):
-            self._write_json(self.planner_items_file, filtered)
-            return True
-        return False
-    
-    def create_inspiration(self, note_id: str, category: str, ai_confidence: float) -> Dict:
-        inspirations = self._read_json(self.inspirations_file)
-        inspiration = {
-            "id": self._generate_id(),
-            "note_id": note_id,
-            "category": category,
-            "ai_confidence": ai_confidence,
-            "created_at": self._now()
-        }
-        inspirations.append(inspiration)
-        self._write_json(self.inspirations_file, inspirations)
+        """Delete a planner item along with its links."""
+        with self.transaction():
+            items = self._collection(self.planner_items_file)
+            if items.remove(item_id) is None:
+                return False
+            self._save(items, deleted=[item_id])
+            self._cascade(self.links_file, "planner_item_id", item_id)
+        return True
+    
+    @_writes
+    def create_inspiration(self, note_id: str, category: str, ai_confidence: float) -> Inspiration:
+        inspirations = self._collection(self.inspirations_file)
+        inspiration = Inspiration.create(
+            id=self._generate_id(),
+            note_id=note_id,
+            category=Inspiration.pack("category", category),
+            ai_confidence=ai_confidence,
+            created_at=self._now()
+        )
+        inspirations.add(inspiration)
+        self._save(inspirations, put=[inspiration])
         return inspiration
     
-    def get_inspirations(self) -> List[Dict]:
-        return self._read_json(self.inspirations_file)
+    @_reads
+    def get_inspirations(self) -> List[Inspiration]:
+        return self._collection(self.inspirations_file).all()
     
-    def get_inspirations_by_note(self, note_id: str) -> List[Dict]:
-        inspirations = self._read_json(self.inspirations_file)
-        return [i for i in inspirations if i["note_id"] == note_id]
+    @_reads
+    def get_inspirations_by_note(self, note_id: str) -> List[Inspiration]:
+        return self._collection(self.inspirations_file).find("note_id", note_id)
+    
+    @_reads
+    def get_inspirations_by_ids(self, inspiration_ids: Sequence[str]) -> List[Inspiration]:
+        inspirations = self._collection(self.inspirations_file)
+        return [i for i in map(inspirations.get, inspiration_ids) if i is not None]
+    
+    @_reads
+    def get_inspirations_grouped(self) -> Dict[str, List[Dict]]:
+        """Inspiration notes grouped by category, each note carrying its inspiration_id and ai_confidence."""
+        notes = self._collection(self.notes_file)
+        inspirations = self._collection(self.inspirations_file)
+        
+        # The category index is the grouping; it is kept current by create/delete_inspiration
+        result = {}
+        for category in inspirations.indexes["category"]:
+            entries = []
+            for inspiration in inspirations.find("category", category):
+                note = notes.get(inspiration.note_id)
+                if note:
+                    entries.append({
+                        **note.to_dict(),
+                        'inspiration_id': inspiration['id'],
+                        'ai_confidence': inspiration.ai_confidence
+                    })
+            if entries:
+                result[category] = entries
+        return result
     
+    @_writes
     def delete_inspiration(self, inspiration_id: str) -> bool:
-        inspirations = self._read_json(self.inspirations_file)
-        filtered = [i for i in inspirations if i["id"] != inspiration_id]
-        if len(filtered) < len(inspirations):
-            self._write_json(self.inspirations_file, filtered)
-            return True
-        return False
-    
-    def create_category(self, name: str, status: str = "active", discovered_by: str = "user") -> Dict:
-        categories = self._read_json(self.categories_file)
-        category = {
-            "id": self._generate_id(),
-            "name": name,
-            "status": status,
-            "discovered_by": discovered_by,
-            "created_at": self._now()
-        }
-        categories.append(category)
-        self._write_json(self.categories_file, categories)
+        inspirations = self._collection(self.inspirations_file)
+        if inspirations.remove(inspiration_id) is None:
+            return False
+        self._save(inspirations, deleted=[inspiration_id])
+        return True
+    
+    @_writes
+    def create_category(self, name: str, status: str = "active", discovered_by: str = "user") -> Category:
+        categories = self._collection(self.categories_file)
+        category = Category.create(
+            id=self._generate_id(),
+            name=name,
+            status=Category.pack("status", status),
+            discovered_by=Category.pack("discovered_by", discovered_by),
+            created_at=self._now()
+        )
+        categories.add(category)
+        self._save(categories, put=[category])
         return category
     
-    def get_categories(self, status: Optional[str] = None) -> List[Dict]:
-        categories = self._read_json(self.categories_file)
+    @_reads
+    def get_categories(self, status: Optional[str] = None) -> List[Category]:
+        categories = self._collection(self.categories_file).all()
         if status:
-            return [c for c in categories if c["status"] == status]
+            return [c for c in categories if c.status == status]
         return categories
     
-    def update_category_status(self, category_id: str, status: str) -> Optional[Dict]:
-        categories = self._read_json(self.categories_file)
-        for category in categories:
-            if category["id"] == category_id:
-                category["status"] = status
-                self._write_json(self.categories_file, categories)
-                return category
-        return None
+    @_writes
+    def update_category_status(self, category_id: str, status: str) -> Optional[Category]:
+        categories = self._collection(self.categories_file)
+        category = categories.get(category_id)
+        if category is None:
+            return None
+        
+        category = categories.update(category, {"status": Category.pack("status", status)})
+        self._save(categories, put=[category])
+        return category
     
+    @_writes
     def delete_category(self, category_id: str) -> bool:
-        categories = self._read_json(self.categories_file)
-        filtered = [c for c in categories if c["id"] != category_id]
-        if len(filtered) < len(categories):
-            self._write_json(self.categories_file, filtered)
-            return True
-        return False
+        categories = self._collection(self.categories_file)
+        if categories.remove(category_id) is None:
+            return False
+        self._save(categories, deleted=[category_id])
+        return True
     
-    def create_link(self, note_id: str, planner_item_id: str) -> Dict:
-        links = self._read_json(self.links_file)
+    @_writes
+    def create_link(self, note_id: str, planner_item_id: str) -> Link:
+        links = self._collection(self.links_file)
         
-        existing = next((l for l in links if l["note_id"] == note_id and l["planner_item_id"] == planner_item_id), None)
+        existing = next((l for l in links.find("note_id", note_id) if l.planner_item_id == planner_item_id), None)
         if existing:
             return existing
         
-        link = {
-            "id": self._generate_id(),
-            "note_id": note_id,
-            "planner_item_id": planner_item_id,
-            "created_at": self._now()
-        }
-        links.append(link)
-        self._write_json(self.links_file, links)
+        link = Link.create(
+            id=self._generate_id(),
+            note_id=note_id,
+            planner_item_id=planner_item_id,
+            created_at=self._now()
+        )
+        links.add(link)
+        self._save(links, put=[link])
         return link
     
-    def get_links_by_note(self, note_id: str) -> List[Dict]:
-        links = self._read_json(self.links_file)
-        return [l for l in links if l["note_id"] == note_id]
+    @_reads
+    def get_links(self) -> List[Link]:
+        return self._collection(self.links_file).all()
     
-    def get_links_by_planner_item(self, planner_item_id: str) -> List[Dict]:
-        links = self._read_json(self.links_file)
-        return [l for l in links if l["planner_item_id"] == planner_item_id]
+    @_reads
+    def get_links_by_note(self, note_id: str) -> List[Link]:
+        return self._collection(self.links_file).find("note_id", note_id)
     
+    @_reads
+    def get_links_by_planner_item(self, planner_item_id: str) -> List[Link]:
+        return self._collection(self.links_file).find("planner_item_id", planner_item_id)
+    
+    @_writes
     def delete_link(self, link_id: str) -> bool:
-        links = self._read_json(self.links_file)
-        filtered = [l for l in links if l["id"] != link_id]
-        if len(filtered) < len(links):
-            self._write_json(self.links_file, filtered)
-            return True
-        return False
+        links = self._collection(self.links_file)
+        if links.remove(link_id) is None:
+            return False
+        self._save(links, deleted=[link_id])
+        return True
+    
+    @_writes
+    def vacuum(self) -> Dict[str, int]:
+        """Delete links and inspirations left behind by notes or planner items deleted
+        before deletes cascaded. Returns the number of records removed per collection."""
+        with self.transaction():
+            notes = self._collection(self.notes_file)
+            items = self._collection(self.planner_items_file)
+            links = self._collection(self.links_file)
+            inspirations = self._collection(self.inspirations_file)
+            
+            orphans = {
+                links: [l for l in links.all()
+                        if notes.get(l.note_id) is None or items.get(l.planner_item_id) is None],
+                inspirations: [i for i in inspirations.all() if notes.get(i.note_id) is None]
+            }
+            for collection, doomed in orphans.items():
+                for record in doomed:
+                    collection.remove(record.id)
+                if doomed:
+                    self._save(collection, deleted=[record["id"] for record in doomed])
+        return {collection.path.stem: len(doomed) for collection, doomed in orphans.items()}
+
+SHARDING_MODES = ("none", "monthly")
+
+def create_storage(base_path: str = "generated") -> LocalStorage:
+    backend = os.getenv("STORAGE_BACKEND", "json")
+    storage_format = os.getenv("STORAGE_FORMAT", "json")
+    sharding = os.getenv("STORAGE_SHARDING", "none")
+    if sharding not in SHARDING_MODES:
+        raise ValueError(f"Unknown STORAGE_SHARDING: {sharding} (expected one of {', '.join(SHARDING_MODES)})")
+    if sharding != "none" and backend != "json":
+        raise ValueError(f"STORAGE_SHARDING={sharding} is only supported by the json backend")
+    if backend == "json":
+        return LocalStorage(base_path, storage_format=storage_format, shard_by_month=sharding == "monthly")
+    if backend == "log":
+        from models.log_storage import LogStorage
+        return LogStorage(base_path, storage_format=storage_format)
+    if backend == "sqlite":
+        from models.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(base_path)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+_on_created: List[Callable[[LocalStorage], None]] = []
+
+def _create_shared_storage() -> LocalStorage:
+    storage = create_storage()
+    for callback in _on_created:
+        callback(storage)
+    return storage
+
+_storage = Lazy(_create_shared_storage)
+
+def on_storage_created(callback: Callable[[LocalStorage], None]):
+    """Run callback with the shared storage before any caller can use it (or now, if it exists)."""
+    with _storage.lock:
+        _on_created.append(callback)
+        storage = _storage.peek()
+    if storage is not None:
+        callback(storage)
+
+def get_storage() -> LocalStorage:
+    """Return the process-wide storage instance shared by all blueprints, creating it on first use."""
+    return _storage.get()
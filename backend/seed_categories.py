@@ -1,7 +1,14 @@
-from models.storage import LocalStorage
+from dotenv import load_dotenv
+
+from models.change_tracker import track_changes
+from models.storage import create_storage
 
 def seed_initial_categories():
-    storage = LocalStorage()
+    # Seed whichever backend the server uses (STORAGE_BACKEND in .env)
+    load_dotenv()
+    storage = create_storage()
+    # Recorded like the app's own changes, so clients fetching deltas receive them
+    track_changes(storage)
     
     initial_categories = [
         "song covers",
@@ -3,26 +3,44 @@ from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 
-from api.notes import notes_bp
-from api.planner import planner_bp
-from api.inspirations import inspirations_bp
-from api.links import links_bp
-from api.ai import ai_bp
-
-load_dotenv()
-
-app = Flask(__name__)
-CORS(app)
-
-app.register_blueprint(notes_bp)
-app.register_blueprint(planner_bp)
-app.register_blueprint(inspirations_bp)
-app.register_blueprint(links_bp)
-app.register_blueprint(ai_bp)
-
-@app.route('/health', methods=['GET'])
-def health_check():
-    return {"status": "healthy"}, 200
+def create_app() -> Flask:
+    """Build the app. Storage, the GPT client and the job queue are created on first use,
+    so this only loads the environment and registers the blueprints."""
+    load_dotenv()
+
+    # Imported here so module-level settings in the blueprints see the loaded .env
+    from api.notes import notes_bp
+    from api.planner import planner_bp
+    from api.inspirations import inspirations_bp
+    from api.links import links_bp
+    from api.ai import ai_bp
+    from api.search import search_bp
+    from api.batch import batch_bp
+    from api.json_provider import OrjsonProvider, RecordJSONProvider
+    from api.metrics import metrics_bp
+    from api.versioning import versioning_bp
+
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app) if OrjsonProvider.available else RecordJSONProvider(app)
+    CORS(app, expose_headers=['ETag', 'X-Collection-Version'])
+
+    app.register_blueprint(notes_bp)
+    app.register_blueprint(planner_bp)
+    app.register_blueprint(inspirations_bp)
+    app.register_blueprint(links_bp)
+    app.register_blueprint(ai_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(versioning_bp)
+
+    @app.route('/health', methods=['GET'])
+    def health_check():
+        return {"status": "healthy"}, 200
+
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
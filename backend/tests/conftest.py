@@ -0,0 +1,39 @@
+import pytest
+
+from models.log_storage import LogStorage
+from models.sqlite_storage import SQLiteStorage
+from models.storage import LocalStorage
+
+BACKENDS = ("json", "sharded", "log", "sqlite")
+
+def open_storage(backend: str, path) -> LocalStorage:
+    """A storage instance of the given backend over the files in path."""
+    if backend == "sqlite":
+        return SQLiteStorage(str(path))
+    if backend == "log":
+        return LogStorage(str(path))
+    return LocalStorage(str(path), shard_by_month=backend == "sharded")
+
+@pytest.fixture(params=BACKENDS)
+def backend(request) -> str:
+    return request.param
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    """The app over storage in a scratch directory, with the GPT client stubbed out."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp("app"))
+        patch.setenv("OPENAI_API_KEY", "test")
+        for name in ("STORAGE_BACKEND", "STORAGE_FORMAT", "STORAGE_SHARDING"):
+            patch.delenv(name, raising=False)
+
+        from benchmarks.stub_gpt import StubGPTClient
+        import models.gpt_client
+        models.gpt_client._client.set(StubGPTClient())
+
+        from server import create_app
+        yield create_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,27 @@
+from models.storage import get_storage
+
+def _titles():
+    return {note["title"] for note in get_storage().get_notes()}
+
+def test_operations_apply_together(client):
+    response = client.post('/api/batch/', json={"operations": [
+        {"method": "POST", "path": "/api/notes/", "body": {"title": "Batch note", "body": "first"}},
+        {"method": "PUT", "path": "/api/notes/$0.id/", "body": {"body": "second"}},
+    ]})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [201, 200]
+    assert get_storage().get_note(results[0]["body"]["id"])["body"] == "second"
+
+def test_operation_without_a_body_fails_and_rolls_back(client):
+    response = client.post('/api/batch/', json={"operations": [
+        {"method": "POST", "path": "/api/notes/", "body": {"title": "Rolled back", "body": "never kept"}},
+        {"method": "POST", "path": "/api/notes/"},
+    ]})
+    assert response.status_code == 415
+    assert response.is_json
+    failure = response.get_json()
+    assert failure["failed_operation"] == 1
+    assert failure["status"] == 415
+    assert "error" in failure["body"]
+    assert "Rolled back" not in _titles()
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from models.gpt_client import GPTClient, _ArrayItemParser
+from models import rate_limiter
+from models.rate_limiter import TokenBucket
+
+CLASSIFICATION = {"classification": "task", "confidence": 0.9, "reasoning": "has a deadline"}
+SUGGESTIONS = {"suggestions": [
+    {"title": "Buy strings", "body": "{not json}", "date": "2026-10-17"},
+    {"title": "Say \"hi\"", "body": "tune [E] first", "date": "2026-10-18"},
+]}
+
+class _FakeCompletions(BaseHTTPRequestHandler):
+    """Answers POST /v1/chat/completions like the OpenAI API, streaming when asked to."""
+
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append((self.path, body))
+        prompt = body["messages"][-1]["content"]
+        content = json.dumps(SUGGESTIONS if "planner" in prompt.lower() else CLASSIFICATION)
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            # Small chunks, so items and strings are split across deltas
+            for start in range(0, len(content), 7):
+                chunk = {"id": "chunk", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                         "choices": [{"index": 0, "delta": {"content": content[start:start + 7]},
+                                      "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        data = json.dumps({
+            "id": "completion", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _FakeCompletions)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/v1"
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def gpt_client(server, monkeypatch):
+    _FakeCompletions.requests.clear()
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_BASE_URL", server)
+    monkeypatch.setenv("GPT_CACHE_ENABLED", "false")
+    return GPTClient.from_env()
+
+def test_sync_call(gpt_client):
+    assert gpt_client.classify_note("Gig", "Play on Friday") == CLASSIFICATION
+    path, body = _FakeCompletions.requests[-1]
+    assert path == "/v1/chat/completions"
+    assert body["response_format"] == {"type": "json_object"}
+    assert "stream" not in body
+
+def test_streamed_items(gpt_client):
+    items = gpt_client.translate_to_planner_stream("Practice plan", "Strings, then scales")
+    assert list(items) == SUGGESTIONS["suggestions"]
+    assert _FakeCompletions.requests[-1][1]["stream"] is True
+
+def test_async_call(gpt_client):
+    async def classify_both():
+        return await asyncio.gather(
+            gpt_client.aclassify_note("Gig", "Play on Friday"),
+            gpt_client.aclassify_note("Song", "Chorus idea")
+        )
+
+    assert asyncio.run(classify_both()) == [CLASSIFICATION, CLASSIFICATION]
+    assert len(_FakeCompletions.requests) == 2
+
+class _FakeTime:
+    """Stands in for the time and asyncio modules in models.rate_limiter: the clock only
+    moves when the limiter sleeps, and every requested sleep is recorded."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = _FakeTime()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(sleep=fake.async_sleep))
+    return fake
+
+def test_client_rate_limit(gpt_client, monkeypatch, fake_time):
+    monkeypatch.setenv("OPENAI_RATE_LIMIT_PER_SECOND", "10")
+    monkeypatch.setenv("OPENAI_RATE_LIMIT_BURST", "1")
+    limited = GPTClient.from_env()
+    for _ in range(3):
+        limited.classify_note("Gig", "Play on Friday")
+    assert fake_time.sleeps == [pytest.approx(0.1), pytest.approx(0.1)]
+    assert len(_FakeCompletions.requests) == 3
+
+def test_token_bucket_burst_then_rate(fake_time):
+    bucket = TokenBucket(rate=20, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    assert fake_time.sleeps == []
+    bucket.acquire()
+    bucket.acquire()
+    assert fake_time.sleeps == [pytest.approx(0.05), pytest.approx(0.05)]
+
+def test_token_bucket_refills_up_to_capacity(fake_time):
+    bucket = TokenBucket(rate=20, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    fake_time.now += 10
+    for _ in range(3):
+        bucket.acquire()
+    assert fake_time.sleeps == [pytest.approx(0.05)]
+
+def test_token_bucket_async(fake_time):
+    bucket = TokenBucket(rate=20, capacity=1)
+
+    async def acquire_three():
+        for _ in range(3):
+            await bucket.acquire_async()
+
+    asyncio.run(acquire_three())
+    assert fake_time.sleeps == [pytest.approx(0.05), pytest.approx(0.05)]
+
+def test_token_bucket_disabled(fake_time):
+    bucket = TokenBucket(rate=0, capacity=1)
+    for _ in range(100):
+        bucket.acquire()
+    assert fake_time.sleeps == []
+
+def test_array_item_parser_across_chunks():
+    text = json.dumps({"reasoning": "a [bracket] and {brace}", **SUGGESTIONS, "done": True})
+    parser = _ArrayItemParser()
+    items = []
+    for ch in text:
+        items.extend(parser.feed(ch))
+    assert items == SUGGESTIONS["suggestions"]
+
+def test_array_item_parser_nested_objects():
+    parser = _ArrayItemParser()
+    first = parser.feed('{"results": [{"id": 1, "meta": {"tags": ["a", "b"]}}, {"id"')
+    assert first == [{"id": 1, "meta": {"tags": ["a", "b"]}}]
+    assert parser.feed(': 2, "note": "ends with \\\\"}]}') == [{"id": 2, "note": "ends with \\"}]
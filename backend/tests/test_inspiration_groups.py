@@ -0,0 +1,38 @@
+from models.inspiration_groups import InspirationGroups
+from tests.conftest import open_storage
+
+def test_follows_own_changes(backend, tmp_path):
+    storage = open_storage(backend, tmp_path)
+    groups = InspirationGroups(storage)
+    note = storage.create_note("Riff", "Palm-muted in drop D")
+    assert groups.grouped() == {}
+
+    inspiration = storage.create_inspiration(note["id"], "music", 0.9)
+    assert [entry["inspiration_id"] for entry in groups.grouped()["music"]] == [inspiration["id"]]
+
+    storage.update_note(note["id"], title="Riff in D")
+    assert groups.grouped()["music"][0]["title"] == "Riff in D"
+
+    storage.delete_inspiration(inspiration["id"])
+    assert groups.grouped() == {}
+
+def test_picks_up_writes_from_another_instance(backend, tmp_path):
+    storage = open_storage(backend, tmp_path)
+    groups = InspirationGroups(storage)
+    # Twice, so the second call is served from what the first one built
+    assert groups.grouped() == {}
+    assert groups.grouped() == {}
+
+    # Another worker or a maintenance script writing to the same files
+    other = open_storage(backend, tmp_path)
+    note = other.create_note("Riff", "Palm-muted in drop D")
+    inspiration = other.create_inspiration(note["id"], "music", 0.9)
+    grouped = groups.grouped()
+    assert list(grouped) == ["music"]
+    assert grouped["music"][0]["inspiration_id"] == inspiration["id"]
+
+    other.update_note(note["id"], title="Riff in drop D, slower")
+    assert groups.grouped()["music"][0]["title"] == "Riff in drop D, slower"
+
+    other.delete_note(note["id"])
+    assert groups.grouped() == {}
@@ -0,0 +1,23 @@
+import logging
+import time
+
+from models.log_storage import COMPACTION_FAILURES, LogStorage
+
+def test_failed_compaction_is_logged_and_counted(tmp_path, monkeypatch, caplog):
+    def fail(self, file_path):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(LogStorage, "compact", fail)
+    monkeypatch.setattr(LogStorage, "_needs_compaction", lambda self, file_path: file_path == self.notes_file)
+    before = COMPACTION_FAILURES._values.get(("notes",), 0)
+
+    with caplog.at_level(logging.ERROR, logger="models.log_storage"):
+        LogStorage(str(tmp_path), compact_interval=0.05)
+        deadline = time.monotonic() + 5
+        while COMPACTION_FAILURES._values.get(("notes",), 0) == before and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert COMPACTION_FAILURES._values.get(("notes",), 0) > before
+    record = next(r for r in caplog.records if r.name == "models.log_storage")
+    assert "notes.json" in record.getMessage()
+    assert record.exc_info[1].args == ("disk full",)
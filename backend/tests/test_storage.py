@@ -0,0 +1,49 @@
+import pytest
+
+from models.storage import LocalStorage
+from tests.conftest import open_storage
+
+def _create_item(storage):
+    return storage.create_planner_item("Rehearse", "Full set", "2026-10-17", None, "daily")
+
+def test_update_planner_item_keeps_id_and_created_at(backend, tmp_path):
+    storage = open_storage(backend, tmp_path)
+    item = _create_item(storage)
+
+    updated = storage.update_planner_item(
+        item["id"], id="other-id", created_at="2000-01-01T00:00:00Z", title="Rehearse twice"
+    )
+    assert updated["id"] == item["id"]
+    assert updated["created_at"] == item["created_at"]
+    assert updated["title"] == "Rehearse twice"
+
+    for current in (storage, open_storage(backend, tmp_path)):
+        assert [i["id"] for i in current.get_planner_items()] == [item["id"]]
+        assert current.get_planner_item("other-id") is None
+
+@pytest.mark.parametrize("shard_by_month", [False, True])
+def test_collection_update_rejects_a_new_id(tmp_path, shard_by_month):
+    storage = LocalStorage(str(tmp_path), shard_by_month=shard_by_month)
+    item = _create_item(storage)
+    items = storage._collection(storage.planner_items_file)
+    with pytest.raises(ValueError):
+        items.update(items.get(item["id"]), {"id": "other-id"})
+    assert [i.id for i in items.all()] == [item["id"]]
+
+def test_manifest_reload_swaps_in_new_id_lists(tmp_path):
+    storage = LocalStorage(str(tmp_path), shard_by_month=True)
+    october = _create_item(storage)
+    items = storage._collection(storage.planner_items_file)
+    ids = items.ids
+    snapshot = {key: set(value) for key, value in ids.items()}
+
+    # Another process adds a month and removes one; readers iterating ids must not see it change
+    other = LocalStorage(str(tmp_path), shard_by_month=True)
+    november = other.create_planner_item("Record", "Demo", "2026-11-02", None, "daily")
+    other.delete_planner_item(october["id"])
+    storage.refresh(["planner_items"])
+
+    assert ids == snapshot
+    assert items.ids is not ids
+    assert set(items.ids) == {"2026-11"}
+    assert [i["id"] for i in storage.get_planner_items()] == [november["id"]]
@@ -0,0 +1,30 @@
+from models.change_tracker import track_changes
+from models.storage import create_storage
+
+def _names(response):
+    return {category["name"] for category in response.get_json()}
+
+def test_etag_changes_after_a_write_outside_the_app(client):
+    first = client.get('/api/inspirations/categories/')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert client.get('/api/inspirations/categories/', headers={'If-None-Match': etag}).status_code == 304
+
+    # As a script would, without recording the change anywhere
+    create_storage().create_category("untracked")
+
+    second = client.get('/api/inspirations/categories/', headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
+    assert "untracked" in _names(second)
+
+def test_tracked_script_changes_reach_deltas(client):
+    version = int(client.get('/api/inspirations/categories/').headers['X-Collection-Version'])
+
+    storage = create_storage()
+    track_changes(storage)
+    category = storage.create_category("seeded")
+
+    delta = client.get(f'/api/changes/inspiration_categories/?since={version}').get_json()
+    assert delta["version"] > version
+    assert [item["id"] for item in delta["items"]] == [category["id"]]
@@ -0,0 +1,20 @@
+from dotenv import load_dotenv
+
+from models.change_tracker import track_changes
+from models.storage import create_storage
+
+def vacuum():
+    # Same STORAGE_BACKEND/STORAGE_FORMAT settings as the server
+    load_dotenv()
+    storage = create_storage()
+    # Recorded like the app's own changes, so clients fetching deltas receive them
+    track_changes(storage)
+    removed = storage.vacuum()
+    
+    for collection, count in removed.items():
+        print(f"Removed {count} orphaned records from {collection}")
+    
+    print("\nVacuum complete!")
+
+if __name__ == '__main__':
+    vacuum()
@@ -16,7 +16,7 @@ import NotesList from './NotesList';
 import NoteDetail from './NoteDetail';
 import ConvertToTaskDialog from './ConvertToTaskDialog';
 import { Note, PlannerItem, CategorizeResponse, TranslateResponse } from '../types';
-import { notesApi, inspirationsApi, aiApi, plannerApi, linksApi } from '../services/api';
+import { notesApi, inspirationsApi, aiApi, batchApi } from '../services/api';
 
 interface NotesViewProps {
   initialSelectedNoteId?: string | null;
@@ -210,15 +210,12 @@ const NotesView: React.FC<NotesViewProps> = ({ initialSelectedNoteId, onNavigate
     if (!selectedNote) return;
 
     try {
-      // Create the planner item
-      const taskResponse = await plannerApi.create(task);
-      const createdTask = taskResponse.data;
-
-      // Create the link between note and task
-      await linksApi.create(selectedNote.id, createdTask.id);
-
-      // Mark note as analyzed (classified as task)
-      await notesApi.markAnalyzed(selectedNote.id);
+      // Create the planner item, link it to the note and mark the note as analyzed in one request
+      await batchApi.run([
+        { method: 'POST', path: '/api/planner/items/', body: task },
+        { method: 'POST', path: '/api/links/', body: { note_id: selectedNote.id, planner_item_id: '$0.id' } },
+        { method: 'PATCH', path: `/api/notes/${selectedNote.id}/`, body: { is_analyzed: true } },
+      ]);
 
       showSnackbar('Task created and linked to note', 'success');
       
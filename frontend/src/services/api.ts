@@ -86,6 +86,18 @@ export const linksApi = {
   delete: (id: string) => api.delete(`/api/links/${id}/`),
 };
 
+export interface BatchOperation {
+  method: 'POST' | 'PUT' | 'PATCH' | 'DELETE';
+  path: string;
+  body?: unknown;
+}
+
+export const batchApi = {
+  // Applied atomically; strings in path/body may reference earlier results as $N or $N.field
+  run: (operations: BatchOperation[]) =>
+    api.post<{ results: { status: number; body: unknown }[] }>('/api/batch/', { operations }),
+};
+
 export const aiApi = {
   classify: (noteId: string) =>
     api.post<{ classification: 'inspiration' | 'task'; confidence: number; reasoning: string }>('/api/ai/classify/', { note_id: noteId }),